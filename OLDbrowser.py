@@ -1,6 +1,18 @@
 import sys
 import json
 import os
+import time
+import tempfile
+import sqlite3
+import math
+import bisect
+import heapq
+import gzip
+import struct
+import mmap
+import threading
+import html
+from collections import OrderedDict, deque
 import urllib.request
 import urllib.error
 from urllib.parse import urlparse
@@ -21,36 +33,1377 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QInputDialog,
     QDialog,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QLabel,
     QSpinBox,
     QComboBox,
     QCheckBox,
     QFileDialog,
+    QCompleter,
+    QPlainTextEdit,
+    QScrollArea,
+    QDockWidget,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QAbstractItemView,
 )
 from PyQt6.QtGui import QAction, QIcon
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineUrlRequestInterceptor
-from PyQt6.QtCore import QUrl, QThread, pyqtSignal, QObject
+from PyQt6.QtWebEngineCore import (
+    QWebEngineProfile,
+    QWebEnginePage,
+    QWebEngineUrlRequestInterceptor,
+    QWebEngineSettings,
+    QWebEngineUrlRequestInfo,
+    QWebEngineUrlScheme,
+    QWebEngineUrlSchemeHandler,
+    QWebEngineScript,
+)
+from PyQt6.QtCore import QUrl, QThread, pyqtSignal, QObject, QTimer, Qt, QAbstractListModel, QModelIndex, QByteArray, QDataStream, QIODevice, QBuffer
+
+# Versões gravadas no cabeçalho de blocked_sites.json e whitelist.json. Um arquivo com as
+# mesmas versões já foi normalizado ao ser salvo e é carregado sem revalidação.
+STORE_FORMAT_VERSION = 2
+NORMALIZER_VERSION = 1
+
+# Chaves de settings.json que não têm mais efeito; descartadas ao carregar para não serem regravadas
+OBSOLETE_SETTINGS = ("save_mode",)
+
+def build_domain_store(domains, settings):
+    return {
+        "format_version": STORE_FORMAT_VERSION,
+        "normalizer_version": NORMALIZER_VERSION,
+        "validation_mode": settings.get("validation_mode", "Rigorosa"),
+        "domains": domains
+    }
+
+def store_domains(data):
+    if isinstance(data, dict):
+        data = data.get("domains")
+    return data if isinstance(data, list) else None
+
+def is_trusted_store(data, settings):
+    return (
+        isinstance(data, dict)
+        and data.get("format_version") == STORE_FORMAT_VERSION
+        and data.get("normalizer_version") == NORMALIZER_VERSION
+        and data.get("validation_mode") == settings.get("validation_mode", "Rigorosa")
+        and isinstance(data.get("domains"), list)
+    )
+
+# Formatos de exportação/importação de domínios: (identificador, filtro do diálogo, extensão)
+DOMAIN_FILE_FORMATS = [
+    ("hosts", "Arquivo hosts (*.hosts)", ".hosts"),
+    ("plain", "Um domínio por linha (*.txt)", ".txt"),
+    ("hosts.gz", "Arquivo hosts compactado (*.hosts.gz)", ".hosts.gz"),
+    ("plain.gz", "Um domínio por linha compactado (*.txt.gz)", ".txt.gz"),
+    ("snapshot", "Snapshot compilado (*.lbsnap)", ".lbsnap"),
+    ("json", "JSON Files (*.json)", ".json"),
+]
+DOMAIN_FILE_EXPORT_FILTERS = ";;".join(label for _, label, _ in DOMAIN_FILE_FORMATS)
+DOMAIN_FILE_IMPORT_FILTERS = "Listas de domínios (*.hosts *.txt *.gz *.lbsnap *.json);;" + DOMAIN_FILE_EXPORT_FILTERS
+SNAPSHOT_MAGIC = b"LBSNAP\x01\n"
+
+def domain_file_format(file_name, selected_filter=""):
+    for file_format, label, _ in DOMAIN_FILE_FORMATS:
+        if selected_filter == label:
+            return file_format
+    name = file_name.lower()
+    for file_format, _, extension in DOMAIN_FILE_FORMATS:
+        if name.endswith(extension):
+            return file_format
+    if name.endswith(".gz"):
+        return "plain.gz"
+    return "plain"
+
+def with_format_extension(file_name, file_format):
+    extensions = {candidate: extension for candidate, _, extension in DOMAIN_FILE_FORMATS}
+    extension = extensions.get(file_format)
+    name = file_name.lower()
+    if extension is None or name.endswith(extension):
+        return file_name
+    # Troca a extensão de outro formato (ex.: .txt.gz -> .hosts.gz) em vez de acumular as duas
+    for known in sorted(set(extensions.values()) | {".gz"}, key=len, reverse=True):
+        if name.endswith(known):
+            return file_name[:-len(known)] + extension
+    return file_name + extension
+
+def extract_list_domain(line, adblock_support=False):
+    line = line.strip()
+    if not line or line.startswith('#') or line.startswith('!'):
+        return None
+    if adblock_support and line.startswith('||') and line.endswith('^'):
+        return line[2:-1].strip()
+    parts = line.split()
+    if len(parts) >= 2 and parts[0] in ('0.0.0.0', '127.0.0.1'):
+        return parts[1].strip()
+    if len(parts) == 1:
+        return parts[0].strip()
+    return None
+
+# Regras de ocultação de elementos: [domínios]##seletor e exceções [domínios]#@#seletor
+COSMETIC_RULE_PATTERN = re.compile(r'^([^#\s]*)#(@?)#(.+)$')
+# Pseudoclasses procedurais (ABP/uBlock) que não são CSS válido
+PROCEDURAL_MARKERS = (
+    ":-abp-", ":-ext-", ":has-text(", ":xpath(", ":matches-css", ":matches-path(", ":matches-attr(",
+    ":matches-prop(", ":upward(", ":remove(", ":style(", ":min-text-length(", ":watch-attr(",
+    ":others(", ":if(", ":if-not(", ":nth-ancestor(", ":contains(",
+)
+
+def parse_cosmetic_rule(line):
+    match = COSMETIC_RULE_PATTERN.match(line.strip())
+    if not match:
+        return None
+    domains_part, exception, selector = match.groups()
+    # "## comentário" e faixas "#####" de arquivos hosts não são regras
+    if not domains_part and selector[0].isspace():
+        return None
+    selector = selector.strip()
+    if selector.startswith("#") and (len(selector) == 1 or selector[1] == "#" or selector[1].isspace()):
+        return None
+    if (not selector or len(selector) > 1000 or selector.startswith(("+js(", "^"))
+            or "{" in selector or "}" in selector or any(marker in selector for marker in PROCEDURAL_MARKERS)):
+        return None
+    domains = []
+    for domain in domains_part.lower().split(","):
+        domain = domain.strip()
+        # Domínios com curinga (google.*) não têm correspondência por sufixo
+        if domain and "*" not in domain:
+            domains.append(domain)
+    if domains_part and not domains:
+        return None
+    return ("allow" if exception else "hide", tuple(domains), selector)
+
+def open_domain_text_file(file_name, mode, file_format):
+    if file_format.endswith(".gz"):
+        return gzip.open(file_name, mode + "t", encoding="utf-8", errors="replace")
+    return open(file_name, mode, encoding="utf-8", errors="replace")
+
+def write_domain_file(file_name, domains, file_format, settings):
+    count = 0
+    if file_format == "snapshot":
+        mode = settings.get("validation_mode", "Rigorosa").encode("utf-8")
+        with open(file_name, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<HHB", STORE_FORMAT_VERSION, NORMALIZER_VERSION, len(mode)))
+            f.write(mode)
+            for domain in domains:
+                encoded = domain.encode("utf-8")
+                f.write(struct.pack("<H", len(encoded)))
+                f.write(encoded)
+                count += 1
+        return count
+    with open_domain_text_file(file_name, "w", file_format) as f:
+        if file_format == "json":
+            f.write("[")
+            for domain in domains:
+                f.write(("," if count else "") + json.dumps(domain))
+                count += 1
+            f.write("]")
+        elif file_format.startswith("hosts"):
+            for domain in domains:
+                f.write(f"0.0.0.0 {domain}\n")
+                count += 1
+        else:
+            for domain in domains:
+                f.write(f"{domain}\n")
+                count += 1
+    return count
+
+class JsonStreamReader:
+    # Leitura incremental de JSON: só o elemento atual fica em memória
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.f.read(self.CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError("Fim inesperado do arquivo JSON.")
+
+    def expect(self, characters):
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(f"JSON inválido: esperado {characters!r}, encontrado {character!r}.")
+        self.position += 1
+        return character
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # Um número no fim do bloco pode continuar no próximo
+                if end < len(self.buffer) or self.eof or not self.fill():
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+
+    def array_items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+def iter_json_domains(f):
+    # Aceita uma lista de domínios ou um arquivo de lista salvo ({"domains": [...]})
+    reader = JsonStreamReader(f)
+    if reader.peek() == "[":
+        yield from reader.array_items()
+        return
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise ValueError("O arquivo deve conter uma lista de domínios.")
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "domains":
+            yield from reader.array_items()
+            return
+        reader.value()
+        if reader.expect(",}") == "}":
+            raise ValueError("O arquivo deve conter uma lista de domínios.")
+
+def read_domain_file(file_name, file_format, settings):
+    # Gera (entrada, confiável); entradas de um snapshot com as mesmas versões já estão normalizadas
+    if file_format == "snapshot":
+        with open(file_name, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError("O arquivo não é um snapshot compilado válido.")
+            format_version, normalizer_version, mode_length = struct.unpack("<HHB", f.read(5))
+            mode = f.read(mode_length).decode("utf-8")
+            trusted = (
+                format_version == STORE_FORMAT_VERSION
+                and normalizer_version == NORMALIZER_VERSION
+                and mode == settings.get("validation_mode", "Rigorosa")
+            )
+            while True:
+                length = f.read(2)
+                if len(length) < 2:
+                    break
+                yield f.read(struct.unpack("<H", length)[0]).decode("utf-8", errors="replace"), trusted
+    elif file_format == "json":
+        with open(file_name, "r", encoding="utf-8") as f:
+            for entry in iter_json_domains(f):
+                yield entry, False
+    else:
+        with open_domain_text_file(file_name, "r", file_format) as f:
+            for line in f:
+                domain = extract_list_domain(line)
+                if domain:
+                    yield domain, False
+
+def write_json_atomic(file_path, data):
+    directory = os.path.dirname(file_path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+class PersistenceWorker(QObject):
+    def __init__(self):
+        super().__init__()
+        # Última geração gravada de cada arquivo; lida por PersistenceService.flush após o fim da thread
+        self.saved_generations = {}
+
+    def write(self, name, file_path, data, generation):
+        try:
+            write_json_atomic(file_path, data)
+            self.saved_generations[name] = max(generation, self.saved_generations.get(name, 0))
+        except (IOError, OSError, TypeError, ValueError) as e:
+            print(f"Erro ao salvar {file_path}: {e}")
+
+class PersistenceService(QObject):
+    write_requested = pyqtSignal(str, str, object, int)
+
+    def __init__(self, delay_ms=500, parent=None):
+        super().__init__(parent)
+        self.stores = {}
+        self.generations = {}
+        self.dirty = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.write_dirty)
+        self.worker_thread = QThread()
+        self.worker = PersistenceWorker()
+        self.worker.moveToThread(self.worker_thread)
+        self.write_requested.connect(self.worker.write)
+        self.worker_thread.start()
+
+    def register(self, name, file_path, snapshot):
+        self.stores[name] = (file_path, snapshot)
+        self.generations[name] = 0
+
+    def mark_dirty(self, name):
+        self.generations[name] += 1
+        self.dirty.add(name)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def write_dirty(self):
+        for name in self.dirty:
+            file_path, snapshot = self.stores[name]
+            self.write_requested.emit(name, file_path, snapshot(), self.generations[name])
+        self.dirty.clear()
+
+    def flush(self):
+        # Chamado no encerramento: para o worker e grava de forma síncrona o que ele não chegou a gravar
+        self.timer.stop()
+        self.dirty.clear()
+        if self.worker_thread.isRunning():
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+        for name, (file_path, snapshot) in self.stores.items():
+            if self.generations[name] > self.worker.saved_generations.get(name, 0):
+                self.worker.write(name, file_path, snapshot(), self.generations[name])
+
+class HistoryStore:
+    def __init__(self, db_file, recent_limit=50):
+        self.db_file = db_file
+        self.recent_limit = recent_limit
+        # Janela das visitas mais recentes (url -> entrada), da mais antiga para a mais nova
+        self.recent = OrderedDict()
+        try:
+            self.connection = sqlite3.connect(db_file)
+        except sqlite3.Error as e:
+            print(f"Erro ao abrir histórico em {db_file}: {e}. Usando histórico em memória.")
+            self.connection = sqlite3.connect(":memory:")
+        try:
+            self.connection.executescript("""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS history (
+                    url TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    visit_count INTEGER NOT NULL DEFAULT 1,
+                    first_visit REAL NOT NULL,
+                    last_visit REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS history_last_visit ON history(last_visit);
+                CREATE INDEX IF NOT EXISTS history_domain ON history(domain, last_visit);
+            """)
+            rows = self.connection.execute(
+                "SELECT url, title, visit_count, last_visit FROM history ORDER BY last_visit DESC LIMIT ?",
+                (recent_limit,)
+            ).fetchall()
+            for row in reversed(rows):
+                entry = self.row_to_entry(row)
+                self.recent[entry["url"]] = entry
+        except sqlite3.Error as e:
+            print(f"Erro ao inicializar histórico em {db_file}: {e}")
+
+    @staticmethod
+    def domain_of(url):
+        domain = urlparse(url).netloc.lower()
+        return domain[4:] if domain.startswith("www.") else domain
+
+    @staticmethod
+    def row_to_entry(row):
+        return {"url": row[0], "title": row[1], "visit_count": row[2], "last_visit": row[3]}
+
+    def add_visit(self, url, title, timestamp=None):
+        # Sem commit aqui: as visitas são gravadas em lote por commit()
+        timestamp = timestamp or time.time()
+        try:
+            self.connection.execute(
+                "INSERT INTO history (url, title, domain, visit_count, first_visit, last_visit) VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET visit_count = visit_count + 1, title = excluded.title, last_visit = excluded.last_visit",
+                (url, title, self.domain_of(url), timestamp, timestamp)
+            )
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar histórico: {e}")
+        entry = self.recent.pop(url, None)
+        if entry is None:
+            row = None
+            try:
+                row = self.connection.execute("SELECT url, title, visit_count, last_visit FROM history WHERE url = ?", (url,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"Erro ao consultar histórico: {e}")
+            entry = self.row_to_entry(row) if row else {"url": url, "title": title, "visit_count": 1, "last_visit": timestamp}
+        else:
+            entry["visit_count"] += 1
+            entry["title"] = title
+            entry["last_visit"] = timestamp
+        self.recent[url] = entry
+        while len(self.recent) > self.recent_limit:
+            self.recent.popitem(last=False)
+        return entry
+
+    def query(self, sql, params=()):
+        try:
+            return [self.row_to_entry(row) for row in self.connection.execute(sql, params)]
+        except sqlite3.Error as e:
+            print(f"Erro ao consultar histórico: {e}")
+            return []
+
+    def last(self, count):
+        if count <= len(self.recent):
+            return list(reversed(self.recent.values()))[:count]
+        return self.query("SELECT url, title, visit_count, last_visit FROM history ORDER BY last_visit DESC LIMIT ?", (count,))
+
+    def by_domain(self, domain, limit=100):
+        # Atendida pelo índice history_domain(domain, last_visit)
+        domain = domain.lower()
+        if domain.startswith("www."):
+            domain = domain[4:]
+        return self.query(
+            "SELECT url, title, visit_count, last_visit FROM history WHERE domain = ? ORDER BY last_visit DESC LIMIT ?",
+            (domain, limit)
+        )
+
+    def between(self, start, end, limit=1000):
+        # Atendida pelo índice history_last_visit
+        return self.query(
+            "SELECT url, title, visit_count, last_visit FROM history WHERE last_visit BETWEEN ? AND ? ORDER BY last_visit DESC LIMIT ?",
+            (start, end, limit)
+        )
+
+    def is_empty(self):
+        return not self.recent
+
+    def most_visited(self, limit):
+        # Uma linha por domínio (a URL mais visitada dele), ordenada pelo total de visitas do domínio
+        return self.query(
+            "SELECT url, title, MAX(visit_count), last_visit FROM history GROUP BY domain ORDER BY SUM(visit_count) DESC LIMIT ?",
+            (limit,)
+        )
+
+    def read_all_rows(self):
+        # Abre uma conexão própria para poder ser chamado a partir de outra thread
+        try:
+            connection = sqlite3.connect(self.db_file)
+            try:
+                return connection.execute("SELECT url, title, visit_count, last_visit FROM history").fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"Erro ao ler histórico de {self.db_file}: {e}")
+            return []
+
+    def commit(self):
+        try:
+            if self.connection.in_transaction:
+                self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar histórico: {e}")
+
+    def clear(self):
+        try:
+            # DELETE sem WHERE usa a otimização de truncamento do SQLite
+            self.connection.execute("DELETE FROM history")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Erro ao limpar histórico: {e}")
+        self.recent.clear()
+
+    def close(self):
+        self.commit()
+        try:
+            self.connection.close()
+        except sqlite3.Error as e:
+            print(f"Erro ao fechar histórico: {e}")
+
+class CompletionIndex:
+    SHORT_PREFIX = 3
+    HEAVY_PREFIX = 200
+    TOP_K = 20
+    MAX_TOKENS = 8
+    # Frecência em escala logarítmica: somar exp(t / TAU) por visita preserva a ordem com o passar do tempo
+    FRECENCY_TAU = 14 * 24 * 3600
+    BOOKMARK_BONUS = math.log(4)
+    TOKEN_RE = re.compile(r"[^\W_]{2,}")
+    SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*://")
+
+    def __init__(self):
+        self.urls = []
+        # id -> [título, frecência, favorito, texto para filtro, chaves]
+        self.entries = []
+        self.ids = {}
+        # Chaves ordenadas no formato "chave\x00id", para busca por prefixo com bisect
+        self.sorted_keys = []
+        # Prefixos curtos ou com muitas chaves guardam os TOP_K ids de maior pontuação
+        self.top_by_prefix = {}
+
+    @classmethod
+    def url_key(cls, url):
+        key = cls.SCHEME_RE.sub("", url.lower())
+        return key[4:] if key.startswith("www.") else key
+
+    @classmethod
+    def build_keys(cls, url, title):
+        key = cls.url_key(url)
+        host = key.split("/", 1)[0]
+        keys = {key}
+        keys.update(cls.TOKEN_RE.findall(title.lower())[:cls.MAX_TOKENS])
+        keys.update(host.split(".")[:-1])
+        return keys
+
+    @staticmethod
+    def prefix_end(prefix):
+        return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    @classmethod
+    def from_entries(cls, history_rows, bookmarks):
+        index = cls()
+        for url, title, visit_count, last_visit in history_rows:
+            index.new_entry(url, title, last_visit / cls.FRECENCY_TAU + math.log(max(visit_count, 1)), False)
+        now = time.time() / cls.FRECENCY_TAU
+        for bookmark in bookmarks:
+            entry_id = index.ids.get(bookmark["url"])
+            if entry_id is None:
+                index.new_entry(bookmark["url"], bookmark["title"], now, True)
+            else:
+                index.entries[entry_id][2] = True
+        sorted_keys = []
+        for entry_id, entry in enumerate(index.entries):
+            sorted_keys.extend(f"{key}\x00{entry_id}" for key in entry[4])
+        sorted_keys.sort()
+        index.sorted_keys = sorted_keys
+        bucketed = index.find_bucketed_prefixes()
+        top_by_prefix = index.top_by_prefix
+        for entry_id in sorted(range(len(index.entries)), key=index.score, reverse=True):
+            for key in index.entries[entry_id][4]:
+                for length in range(1, len(key) + 1):
+                    prefix = key[:length]
+                    if prefix not in bucketed:
+                        break
+                    bucket = top_by_prefix.setdefault(prefix, [])
+                    if len(bucket) < cls.TOP_K and entry_id not in bucket:
+                        bucket.append(entry_id)
+        return index
+
+    def find_bucketed_prefixes(self):
+        keys = self.sorted_keys
+        bucketed = set()
+        pending = [("", 0, len(keys))]
+        while pending:
+            prefix, low, high = pending.pop()
+            position = low
+            while position < high:
+                key = keys[position]
+                separator = key.index("\x00")
+                if separator <= len(prefix):
+                    position += 1
+                    continue
+                child = key[:len(prefix) + 1]
+                child_high = bisect.bisect_left(keys, self.prefix_end(child), position, high)
+                if len(child) <= self.SHORT_PREFIX or child_high - position > self.HEAVY_PREFIX:
+                    bucketed.add(child)
+                    pending.append((child, position, child_high))
+                position = child_high
+        return bucketed
+
+    def new_entry(self, url, title, frecency, bookmarked):
+        entry_id = len(self.entries)
+        self.urls.append(url)
+        self.entries.append([title, frecency, bookmarked, f"{self.url_key(url)} {title.lower()}", self.build_keys(url, title)])
+        self.ids[url] = entry_id
+        return entry_id
+
+    def score(self, entry_id):
+        entry = self.entries[entry_id]
+        return entry[1] + (self.BOOKMARK_BONUS if entry[2] else 0.0)
+
+    def upsert(self, url, title, frecency, bookmarked):
+        entry_id = self.ids.get(url)
+        if entry_id is None:
+            entry_id = self.new_entry(url, title, frecency, bookmarked)
+            entry = self.entries[entry_id]
+            new_keys = entry[4]
+        else:
+            entry = self.entries[entry_id]
+            keys = self.build_keys(url, title)
+            new_keys = keys - entry[4]
+            # Palavras de títulos antigos deixam de levar a esta entrada
+            self.remove_keys(entry_id, entry[4] - keys, keys)
+            entry[0], entry[1], entry[2] = title, frecency, bookmarked
+            entry[3] = f"{self.url_key(url)} {title.lower()}"
+            entry[4] = keys
+        for key in new_keys:
+            bisect.insort(self.sorted_keys, f"{key}\x00{entry_id}")
+        score = self.score(entry_id)
+        for key in entry[4]:
+            for length in range(1, len(key) + 1):
+                prefix = key[:length]
+                bucket = self.top_by_prefix.get(prefix)
+                if bucket is None:
+                    if length > self.SHORT_PREFIX:
+                        break
+                    bucket = self.top_by_prefix[prefix] = []
+                if entry_id in bucket:
+                    bucket.remove(entry_id)
+                position = 0
+                while position < len(bucket) and self.score(bucket[position]) >= score:
+                    position += 1
+                if position < self.TOP_K:
+                    bucket.insert(position, entry_id)
+                    del bucket[self.TOP_K:]
+
+    def remove_keys(self, entry_id, removed_keys, kept_keys):
+        for key in removed_keys:
+            item = f"{key}\x00{entry_id}"
+            position = bisect.bisect_left(self.sorted_keys, item)
+            if position < len(self.sorted_keys) and self.sorted_keys[position] == item:
+                del self.sorted_keys[position]
+            for length in range(1, len(key) + 1):
+                prefix = key[:length]
+                bucket = self.top_by_prefix.get(prefix)
+                if bucket is None:
+                    if length > self.SHORT_PREFIX:
+                        break
+                    continue
+                if entry_id not in bucket or any(kept.startswith(prefix) for kept in kept_keys):
+                    continue
+                full = len(bucket) >= self.TOP_K
+                bucket.remove(entry_id)
+                if full:
+                    self.refill_bucket(prefix, entry_id)
+
+    def refill_bucket(self, prefix, excluded_id):
+        # Um balde cheio que perdeu uma entrada é recalculado para não esconder a próxima melhor
+        low = bisect.bisect_left(self.sorted_keys, prefix)
+        high = bisect.bisect_left(self.sorted_keys, self.prefix_end(prefix), low)
+        found = {int(key.rsplit("\x00", 1)[1]) for key in self.sorted_keys[low:high]}
+        found.discard(excluded_id)
+        self.top_by_prefix[prefix] = heapq.nlargest(self.TOP_K, found, key=self.score)
+
+    def add_visit(self, url, title, timestamp=None):
+        visit = (timestamp or time.time()) / self.FRECENCY_TAU
+        entry_id = self.ids.get(url)
+        if entry_id is None:
+            self.upsert(url, title, visit, False)
+        else:
+            entry = self.entries[entry_id]
+            high, low = max(entry[1], visit), min(entry[1], visit)
+            self.upsert(url, title, high + math.log1p(math.exp(low - high)), entry[2])
+
+    def add_bookmark(self, url, title):
+        entry_id = self.ids.get(url)
+        if entry_id is None:
+            self.upsert(url, title, time.time() / self.FRECENCY_TAU, True)
+        else:
+            entry = self.entries[entry_id]
+            self.upsert(url, entry[0] or title, entry[1], True)
+
+    def complete(self, text, limit=8):
+        words = self.url_key(text.strip()).split()
+        if not words:
+            return []
+        # A palavra mais longa é a mais seletiva; as demais apenas filtram os candidatos
+        first_index = max(range(len(words)), key=lambda i: len(words[i]))
+        first = words[first_index]
+        rest = words[:first_index] + words[first_index + 1:]
+        candidates = self.top_by_prefix.get(first)
+        if candidates is None or (rest and len(candidates) >= self.TOP_K):
+            low = bisect.bisect_left(self.sorted_keys, first)
+            high = min(len(self.sorted_keys), low + self.HEAVY_PREFIX * 2)
+            high = bisect.bisect_left(self.sorted_keys, self.prefix_end(first), low, high)
+            found = {int(key.rsplit("\x00", 1)[1]) for key in self.sorted_keys[low:high]}
+            found.update(candidates or ())
+            candidates = heapq.nlargest(len(found) if rest else limit, found, key=self.score)
+        results = []
+        for entry_id in candidates:
+            entry = self.entries[entry_id]
+            if all(word in entry[3] for word in rest):
+                results.append((self.urls[entry_id], entry[0]))
+                if len(results) >= limit:
+                    break
+        return results
+
+class CompletionIndexBuilder(QObject):
+    finished = pyqtSignal(object)
+
+    def __init__(self, history_store, bookmarks):
+        super().__init__()
+        self.history_store = history_store
+        self.bookmarks = bookmarks
+
+    def run(self):
+        self.finished.emit(CompletionIndex.from_entries(self.history_store.read_all_rows(), self.bookmarks))
+
+class UrlCompletionModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.suggestions = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.suggestions)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.suggestions):
+            return None
+        url, title = self.suggestions[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{title} — {url}" if title else url
+        if role == Qt.ItemDataRole.EditRole:
+            return url
+        return None
+
+    def set_suggestions(self, suggestions):
+        self.beginResetModel()
+        self.suggestions = suggestions
+        self.endResetModel()
+
+class StartupProfiler:
+    def __init__(self, enabled=False, report_file="startup_profile.json"):
+        self.enabled = enabled
+        self.report_file = report_file
+        self.start = time.perf_counter()
+        self.phases = []
+        self.finished = False
+
+    @classmethod
+    def from_environment(cls, argv):
+        enabled = "--startup-profile" in argv or os.environ.get("LUKEBROWSER_STARTUP_PROFILE", "0") not in ("", "0")
+        return cls(enabled)
+
+    def mark(self, phase):
+        if self.enabled and not self.finished:
+            self.phases.append((phase, time.perf_counter()))
+
+    def finish(self):
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        report = []
+        previous = self.start
+        for phase, timestamp in self.phases:
+            report.append({
+                "phase": phase,
+                "elapsed_ms": round((timestamp - self.start) * 1000, 2),
+                "duration_ms": round((timestamp - previous) * 1000, 2)
+            })
+            previous = timestamp
+        print("Linha do tempo de inicialização:")
+        for entry in report:
+            print(f"  {entry['elapsed_ms']:>10.2f} ms (+{entry['duration_ms']:.2f} ms)  {entry['phase']}")
+        try:
+            with open(self.report_file, "w") as f:
+                json.dump(report, f, indent=4)
+        except IOError as e:
+            print(f"Erro ao salvar relatório de inicialização em {self.report_file}: {e}")
+
+DEFAULT_CONSOLE_SILENCED = [
+    "Unrecognized feature:",
+    "non-JS module files deprecated",
+    "Deprecated API",
+    "Permissions-Policy",
+    "crbug/"
+]
+
+class ConsoleMessageFilter:
+    WINDOW = 1.0
+    # Limite por página = limite por fonte multiplicado por este fator
+    PAGE_LIMIT_FACTOR = 4
+    MAX_WINDOWS = 2000
+
+    def __init__(self, patterns, rate_limit, capacity=1000):
+        self.configure(patterns, rate_limit)
+        # Anel das mensagens recentes: (horário, nível, mensagem, linha, fonte, URL da página)
+        self.messages = deque(maxlen=capacity)
+        # Chave (página, fonte) ou (página, None) -> [início da janela, aceitas, suprimidas]
+        self.windows = {}
+        # Chaves cujas janelas têm supressões ainda não resumidas no anel
+        self.pending = set()
+        self.filtered_count = 0
+        self.suppressed = {}
+
+    def configure(self, patterns, rate_limit):
+        patterns = [pattern for pattern in patterns if pattern]
+        # Todos os padrões num único regex: uma busca por mensagem em vez de um teste por padrão
+        self.matcher = re.compile("|".join(re.escape(pattern) for pattern in patterns)) if patterns else None
+        self.rate_limit = rate_limit
+
+    def append_summary(self, key, window, now):
+        # Registrado com o horário em que a janela terminou, não o da próxima mensagem
+        source = key[1] if key[1] is not None else "(página inteira)"
+        ended = time.time() - max(0.0, now - window[0] - self.WINDOW)
+        self.messages.append((ended, "Supressão", f"{window[2]} mensagem(ns) suprimida(s) por excesso", 0, source, ""))
+        window[2] = 0
+
+    def flush_expired(self, now=None):
+        # Resume as janelas já encerradas mesmo que a fonte tenha parado de enviar mensagens
+        if not self.pending:
+            return
+        if now is None:
+            now = time.monotonic()
+        for key in [key for key in self.pending if now - self.windows[key][0] >= self.WINDOW]:
+            self.append_summary(key, self.windows[key], now)
+            self.pending.discard(key)
+
+    def allow(self, key, limit, now):
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.WINDOW:
+            if window is None and len(self.windows) >= self.MAX_WINDOWS:
+                self.flush_expired(now)
+                self.windows = {k: w for k, w in self.windows.items() if now - w[0] < self.WINDOW}
+            window = self.windows[key] = [now, 0, 0]
+        if window[1] >= limit:
+            window[2] += 1
+            self.pending.add(key)
+            return False
+        window[1] += 1
+        return True
+
+    def handle(self, page, level, message, line_number, source_id):
+        if self.matcher is not None and self.matcher.search(message):
+            self.filtered_count += 1
+            return
+        if self.rate_limit:
+            now = time.monotonic()
+            self.flush_expired(now)
+            page_key = id(page)
+            if not self.allow((page_key, source_id), self.rate_limit, now) or not self.allow((page_key, None), self.rate_limit * self.PAGE_LIMIT_FACTOR, now):
+                self.suppressed[source_id] = self.suppressed.get(source_id, 0) + 1
+                return
+        level_name = level.name.replace("MessageLevel", "") if hasattr(level, "name") else str(level)
+        self.messages.append((time.time(), level_name, message, line_number, source_id, page.url().toString()))
+
+    def clear(self):
+        self.messages.clear()
+        self.pending.clear()
+        for window in self.windows.values():
+            window[2] = 0
+        self.filtered_count = 0
+        self.suppressed.clear()
+
+class ConsoleViewerDialog(QDialog):
+    def __init__(self, console_filter, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Console JavaScript")
+        self.setMinimumSize(700, 450)
+        self.console_filter = console_filter
+
+        layout = QVBoxLayout()
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        self.messages_view = QPlainTextEdit()
+        self.messages_view.setReadOnly(True)
+        self.messages_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.messages_view)
+
+        button_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Atualizar")
+        self.refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(self.refresh_button)
+        self.clear_button = QPushButton("Limpar")
+        self.clear_button.clicked.connect(self.clear_messages)
+        button_layout.addWidget(self.clear_button)
+        self.close_button = QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        console_filter = self.console_filter
+        console_filter.flush_expired()
+        suppressed_total = sum(console_filter.suppressed.values())
+        top_sources = sorted(console_filter.suppressed.items(), key=lambda item: item[1], reverse=True)[:3]
+        summary = f"{len(console_filter.messages)} mensagem(ns) recente(s), {console_filter.filtered_count} filtrada(s) por padrão, {suppressed_total} suprimida(s) por excesso."
+        if top_sources:
+            summary += " Mais suprimidas: " + ", ".join(f"{source or '(sem fonte)'} ({count})" for source, count in top_sources)
+        self.summary_label.setText(summary)
+        self.messages_view.setPlainText("\n".join(
+            f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] {level} {source}:{line} {message}" + (f"  ({page_url})" if page_url else "")
+            for timestamp, level, message, line, source, page_url in console_filter.messages
+        ))
+        self.messages_view.verticalScrollBar().setValue(self.messages_view.verticalScrollBar().maximum())
+
+    def clear_messages(self):
+        self.console_filter.clear()
+        self.refresh()
+
+def hide_rule(selector):
+    return f"{selector} {{ display: none !important; }}"
+
+class CosmeticFilterIndex:
+    SITE_CACHE_SIZE = 128
+
+    def __init__(self):
+        self.generic = set()
+        self.generic_exceptions = set()
+        # domínio -> seletores ocultados / liberados naquele domínio e subdomínios
+        self.domains = {}
+        self.exceptions = {}
+        self.generic_css_cache = None
+        self.generic_exceptions_cache = None
+        self.site_cache = OrderedDict()
+
+    @classmethod
+    def from_data(cls, data):
+        index = cls()
+        index.generic.update(data.get("generic", []))
+        index.generic_exceptions.update(data.get("generic_exceptions", []))
+        for domain, selectors in data.get("domains", {}).items():
+            index.domains[domain] = set(selectors)
+        for domain, selectors in data.get("exceptions", {}).items():
+            index.exceptions[domain] = set(selectors)
+        return index
+
+    def to_data(self):
+        return {
+            "generic": sorted(self.generic),
+            "generic_exceptions": sorted(self.generic_exceptions),
+            "domains": {domain: sorted(selectors) for domain, selectors in self.domains.items()},
+            "exceptions": {domain: sorted(selectors) for domain, selectors in self.exceptions.items()},
+        }
+
+    def rule_count(self):
+        return (len(self.generic) + len(self.generic_exceptions)
+                + sum(len(selectors) for selectors in self.domains.values())
+                + sum(len(selectors) for selectors in self.exceptions.values()))
+
+    def add_rules(self, rules):
+        added = 0
+        for kind, domains, selector in rules:
+            # Só domínios negados (~a.com##x): regra genérica com exceções
+            if kind == "hide" and domains and all(domain.startswith("~") for domain in domains):
+                if selector not in self.generic:
+                    self.generic.add(selector)
+                    added += 1
+            if not domains:
+                target = self.generic if kind == "hide" else self.generic_exceptions
+                if selector not in target:
+                    target.add(selector)
+                    added += 1
+                continue
+            for domain in domains:
+                # ~dominio numa regra de ocultação equivale a uma exceção naquele domínio
+                if domain.startswith("~"):
+                    domain, table = domain[1:], (self.exceptions if kind == "hide" else None)
+                else:
+                    table = self.domains if kind == "hide" else self.exceptions
+                if not domain or table is None:
+                    continue
+                selectors = table.setdefault(domain, set())
+                if selector not in selectors:
+                    selectors.add(selector)
+                    added += 1
+        if added:
+            self.generic_css_cache = None
+            self.generic_exceptions_cache = None
+            self.site_cache.clear()
+        return added
+
+    def generic_css(self):
+        if self.generic_css_cache is None:
+            # Uma regra por seletor: um seletor inválido não derruba os demais
+            self.generic_css_cache = "\n".join(hide_rule(selector) for selector in sorted(self.generic - self.generic_exceptions))
+        return self.generic_css_cache
+
+    def excepted_generic_rules(self):
+        # domínio -> regras genéricas que não valem ali; o script genérico as remove da folha antes de injetá-la
+        if self.generic_exceptions_cache is None:
+            active = self.generic - self.generic_exceptions
+            self.generic_exceptions_cache = {
+                domain: sorted(hide_rule(selector) for selector in selectors & active)
+                for domain, selectors in self.exceptions.items()
+                if not selectors.isdisjoint(active)
+            }
+        return self.generic_exceptions_cache
+
+    def site_css(self, host):
+        host = host.lower().rstrip(".")
+        if host in self.site_cache:
+            self.site_cache.move_to_end(host)
+            return self.site_cache[host]
+        hidden = set()
+        allowed = set()
+        parts = host.split(".")
+        for i in range(len(parts)):
+            suffix = ".".join(parts[i:])
+            hidden.update(self.domains.get(suffix, ()))
+            allowed.update(self.exceptions.get(suffix, ()))
+        css = "\n".join(hide_rule(selector) for selector in sorted(hidden - allowed))
+        self.site_cache[host] = css
+        if len(self.site_cache) > self.SITE_CACHE_SIZE:
+            self.site_cache.popitem(last=False)
+        return css
+
+COSMETIC_GENERIC_SCRIPT = "lukebrowser-cosmetic-generic"
+COSMETIC_SITE_SCRIPT = "lukebrowser-cosmetic-site"
+
+# <style> filho do <html>: adoptedStyleSheets seria descartado por páginas que reatribuem a lista.
+# O observador insere o elemento quando o <html> surge e o devolve se a página o remover.
+STYLE_INJECTION_TEMPLATE = """
+(function() {
+    var style = document.createElement('style');
+    style.textContent = %s;
+    var observed = null;
+    var observer = new MutationObserver(attach);
+    function attach() {
+        var root = document.documentElement;
+        if (!root) {
+            return;
+        }
+        if (style.parentNode !== root) {
+            root.appendChild(style);
+        }
+        if (observed !== root) {
+            observed = root;
+            observer.observe(root, {childList: true});
+        }
+    }
+    observer.observe(document, {childList: true});
+    attach();
+})();
+"""
+
+# Retira da folha genérica as regras com exceção no host do quadro (ou em domínios acima dele)
+EXCEPTED_RULES_FILTER_TEMPLATE = """(function(css, excepted) {
+    var parts = location.hostname.toLowerCase().replace(/\\.$/, '').split('.');
+    var skip = new Set();
+    for (var i = 0; i < parts.length; i++) {
+        (excepted[parts.slice(i).join('.')] || []).forEach(function(rule) { skip.add(rule); });
+    }
+    if (!skip.size) {
+        return css;
+    }
+    return css.split('\\n').filter(function(rule) { return !skip.has(rule); }).join('\\n');
+})(%s, %s)"""
+
+def build_style_script(name, css, runs_on_subframes, excepted_rules=None):
+    script = QWebEngineScript()
+    script.setName(name)
+    script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+    script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+    script.setRunsOnSubFrames(runs_on_subframes)
+    css_source = json.dumps(css)
+    if excepted_rules:
+        css_source = EXCEPTED_RULES_FILTER_TEMPLATE % (css_source, json.dumps(excepted_rules))
+    script.setSourceCode(STYLE_INJECTION_TEMPLATE % css_source)
+    return script
+
+def replace_style_script(collection, name, css, runs_on_subframes, excepted_rules=None):
+    for script in collection.find(name):
+        collection.remove(script)
+    if css:
+        collection.insert(build_style_script(name, css, runs_on_subframes, excepted_rules))
+
+# Atributos que podem ser ajustados por site: nome -> (atributo, rótulo)
+SITE_SETTING_ATTRIBUTES = {
+    "JavascriptEnabled": (QWebEngineSettings.WebAttribute.JavascriptEnabled, "JavaScript"),
+    "AutoLoadImages": (QWebEngineSettings.WebAttribute.AutoLoadImages, "Carregar Imagens"),
+    "PlaybackRequiresUserGesture": (QWebEngineSettings.WebAttribute.PlaybackRequiresUserGesture, "Exigir Clique para Reproduzir Mídia"),
+    "JavascriptCanOpenWindows": (QWebEngineSettings.WebAttribute.JavascriptCanOpenWindows, "Janelas Abertas por JavaScript"),
+    "WebGLEnabled": (QWebEngineSettings.WebAttribute.WebGLEnabled, "WebGL"),
+}
+
+class SiteSettingsStore:
+    def __init__(self, rules=None):
+        # domínio -> {nome do atributo: valor}; vale para o domínio e seus subdomínios
+        self.rules = {}
+        for domain, values in (rules or {}).items():
+            if isinstance(domain, str) and isinstance(values, dict):
+                values = {name: value for name, value in values.items() if name in SITE_SETTING_ATTRIBUTES and isinstance(value, bool)}
+                if values:
+                    self.rules[domain.lower()] = values
+
+    def to_data(self):
+        return {domain: dict(values) for domain, values in sorted(self.rules.items())}
+
+    def lookup(self, host):
+        # Mesma correspondência por sufixo da lista de bloqueio; a regra mais específica prevalece
+        if not self.rules or not host:
+            return {}
+        parts = host.lower().rstrip(".").split(".")
+        values = {}
+        for i in range(len(parts) - 1, -1, -1):
+            values.update(self.rules.get(".".join(parts[i:]), {}))
+        return values
+
+    def set(self, domain, values):
+        values = {name: value for name, value in values.items() if name in SITE_SETTING_ATTRIBUTES}
+        if values:
+            self.rules[domain] = values
+        else:
+            self.rules.pop(domain, None)
+
+    def remove(self, domain):
+        return self.rules.pop(domain, None) is not None
 
 class CustomWebEnginePage(QWebEnginePage):
+    # (URL anterior, nova URL) a cada navegação do quadro principal
+    main_frame_navigation = pyqtSignal(QUrl, QUrl)
+    # Compartilhado por todas as páginas; configurado pelo Browser
+    console_filter = ConsoleMessageFilter(DEFAULT_CONSOLE_SILENCED, 20)
+    # Índice de regras de ocultação; None desativa a filtragem cosmética
+    cosmetic_filters = None
+    # SiteSettingsStore com as configurações por site
+    site_settings = None
+
     def __init__(self, profile=None, parent=None):
         super().__init__(profile, parent)
+        self.applied_site_settings = {}
+
+    def acceptNavigationRequest(self, url, navigation_type, is_main_frame):
+        if is_main_frame:
+            self.main_frame_navigation.emit(self.url(), url)
+            self.update_cosmetic_script(url)
+            self.apply_site_settings(url)
+        return super().acceptNavigationRequest(url, navigation_type, is_main_frame)
+
+    def apply_site_settings(self, url):
+        # Aplicado antes do commit da navegação, para valer desde o início do novo documento
+        values = {}
+        if self.site_settings is not None and url.scheme() in ("http", "https"):
+            values = self.site_settings.lookup(url.host(QUrl.ComponentFormattingOption.FullyEncoded))
+        if values == self.applied_site_settings:
+            return False
+        settings = self.settings()
+        for name, (attribute, _) in SITE_SETTING_ATTRIBUTES.items():
+            if name in values:
+                settings.setAttribute(attribute, values[name])
+            elif name in self.applied_site_settings:
+                settings.resetAttribute(attribute)
+        self.applied_site_settings = values
+        return True
+
+    def update_cosmetic_script(self, url):
+        # Os scripts da página valem para o próximo documento carregado
+        css = ""
+        if self.cosmetic_filters is not None and url.scheme() in ("http", "https"):
+            css = self.cosmetic_filters.site_css(url.host())
+        replace_style_script(self.scripts(), COSMETIC_SITE_SCRIPT, css, False)
 
     def javaScriptConsoleMessage(self, level, message, lineNumber, sourceID):
-        silenced = [
-            "Unrecognized feature:",
-            "non-JS module files deprecated",
-            "Deprecated API",
-            "Permissions-Policy",
-            "crbug/"
-        ]
-        if not any(s in message for s in silenced):
-            super().javaScriptConsoleMessage(level, message, lineNumber, sourceID)
+        self.console_filter.handle(self, level, message, lineNumber, sourceID)
+
+CACHE_TYPES = {
+    "Memória": QWebEngineProfile.HttpCacheType.MemoryHttpCache,
+    "Disco": QWebEngineProfile.HttpCacheType.DiskHttpCache,
+    "Sem cache": QWebEngineProfile.HttpCacheType.NoCache,
+}
+
+# Arquivos de entrada do cache simples do Chromium: <hash de 16 dígitos hex>_<fluxo>
+CACHE_ENTRY_PATTERN = re.compile(r'^([0-9a-f]{16})_[0-9s]$')
+
+def cache_directory_stats(path):
+    total_size = 0
+    file_count = 0
+    entries = set()
+    pending = [path]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        file_count += 1
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                        match = CACHE_ENTRY_PATTERN.match(entry.name)
+                        if match:
+                            entries.add(match.group(1))
+        except OSError:
+            continue
+    return total_size, len(entries), file_count
+
+class CacheStatsDialog(QDialog):
+    def __init__(self, profiles, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Estatísticas do Cache")
+        self.setMinimumSize(450, 250)
+        self.profiles = profiles
+
+        layout = QVBoxLayout()
+        self.stats_label = QLabel()
+        self.stats_label.setWordWrap(True)
+        self.stats_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.stats_label)
+
+        button_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Atualizar")
+        self.refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(self.refresh_button)
+        self.close_button = QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        type_names = {cache_type: name for name, cache_type in CACHE_TYPES.items()}
+        lines = []
+        for name, profile in self.profiles:
+            cache_type = profile.httpCacheType()
+            max_size = profile.httpCacheMaximumSize()
+            lines.append(f"<b>{name}</b>")
+            lines.append(f"Tipo: {type_names.get(cache_type, cache_type)}{' (perfil sem armazenamento em disco)' if profile.isOffTheRecord() else ''}")
+            lines.append(f"Tamanho máximo: {f'{max_size // (1024 * 1024)} MB' if max_size else 'automático'}")
+            if cache_type == QWebEngineProfile.HttpCacheType.DiskHttpCache:
+                total_size, entry_count, file_count = cache_directory_stats(profile.cachePath())
+                lines.append(f"Pasta: {profile.cachePath()}")
+                lines.append(f"Em disco: {total_size / (1024 * 1024):.1f} MB em {file_count} arquivo(s), {entry_count} entrada(s)")
+            lines.append("")
+        self.stats_label.setText("<br>".join(lines))
+
+PROCESS_MODELS = {
+    "Por instância de site (padrão)": [],
+    "Por site": ["--process-per-site"],
+}
+
+def read_startup_settings(settings_file):
+    # Leitura mínima, antes da QApplication existir; os diálogos cuidam de criar e validar o arquivo
+    try:
+        with open(settings_file, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def build_chromium_flags(settings):
+    flags = list(PROCESS_MODELS.get(settings.get("process_model"), []))
+    renderer_process_limit = settings.get("renderer_process_limit", 0)
+    if isinstance(renderer_process_limit, int) and renderer_process_limit > 0:
+        flags.append(f"--renderer-process-limit={renderer_process_limit}")
+    if settings.get("disable_gpu_rasterization", False):
+        flags.append("--disable-gpu-rasterization")
+    if settings.get("disable_gpu", False):
+        flags.append("--disable-gpu")
+    extra_flags = settings.get("extra_chromium_flags", "")
+    if isinstance(extra_flags, str):
+        flags.extend(flag for flag in extra_flags.split() if flag.startswith("--"))
+    return flags
+
+def apply_chromium_flags(settings):
+    # Precisa rodar antes da QApplication: o QtWebEngine lê QTWEBENGINE_CHROMIUM_FLAGS uma única vez
+    environment_flags = os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", "").split()
+    configured = {flag.split("=", 1)[0] for flag in environment_flags}
+    flags = environment_flags + [flag for flag in build_chromium_flags(settings) if flag.split("=", 1)[0] not in configured]
+    if flags:
+        os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = " ".join(flags)
+    print(f"Flags efetivas do Chromium: {' '.join(flags) if flags else '(nenhuma)'}")
+    return flags
+
+class SiteSettingsDialog(QDialog):
+    STATES = ["Padrão", "Ativado", "Desativado"]
+
+    def __init__(self, store, normalize_domain, changed_callback, host=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Configurações por Site")
+        self.setMinimumSize(650, 450)
+        self.store = store
+        self.normalize_domain = normalize_domain
+        self.changed_callback = changed_callback
+
+        layout = QVBoxLayout()
+        self.rules_tree = QTreeWidget()
+        self.rules_tree.setHeaderLabels(["Site"] + [label for _, label in SITE_SETTING_ATTRIBUTES.values()])
+        self.rules_tree.setRootIsDecorated(False)
+        self.rules_tree.itemSelectionChanged.connect(self.load_selected_rule)
+        layout.addWidget(self.rules_tree)
+
+        layout.addWidget(QLabel("Site (vale também para os subdomínios):"))
+        self.domain_input = QLineEdit()
+        self.domain_input.setPlaceholderText("ex: example.com")
+        layout.addWidget(self.domain_input)
+        self.state_inputs = {}
+        for name, (_, label) in SITE_SETTING_ATTRIBUTES.items():
+            row = QHBoxLayout()
+            row.addWidget(QLabel(f"{label}:"))
+            state_input = QComboBox()
+            state_input.addItems(self.STATES)
+            row.addWidget(state_input)
+            layout.addLayout(row)
+            self.state_inputs[name] = state_input
+
+        button_layout = QHBoxLayout()
+        self.save_rule_button = QPushButton("Salvar Regra")
+        self.save_rule_button.clicked.connect(self.save_rule)
+        button_layout.addWidget(self.save_rule_button)
+        self.remove_rule_button = QPushButton("Remover Regra")
+        self.remove_rule_button.clicked.connect(self.remove_rule)
+        button_layout.addWidget(self.remove_rule_button)
+        self.close_button = QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.refresh()
+        if host:
+            self.domain_input.setText(host)
+            matches = self.rules_tree.findItems(host, Qt.MatchFlag.MatchExactly, 0)
+            if matches:
+                self.rules_tree.setCurrentItem(matches[0])
+
+    def refresh(self):
+        self.rules_tree.clear()
+        for domain, values in sorted(self.store.rules.items()):
+            columns = [domain]
+            for name in SITE_SETTING_ATTRIBUTES:
+                columns.append(self.STATES[0] if name not in values else self.STATES[1] if values[name] else self.STATES[2])
+            self.rules_tree.addTopLevelItem(QTreeWidgetItem(columns))
+
+    def load_selected_rule(self):
+        item = self.rules_tree.currentItem()
+        if item is None:
+            return
+        domain = item.text(0)
+        values = self.store.rules.get(domain, {})
+        self.domain_input.setText(domain)
+        for name, state_input in self.state_inputs.items():
+            state_input.setCurrentIndex(0 if name not in values else 1 if values[name] else 2)
+
+    def save_rule(self):
+        domain = self.normalize_domain(self.domain_input.text())
+        if not domain:
+            QMessageBox.warning(self, "Site Inválido", "Informe um domínio válido.")
+            return
+        values = {name: state_input.currentIndex() == 1 for name, state_input in self.state_inputs.items() if state_input.currentIndex()}
+        self.store.set(domain, values)
+        print(f"Configurações do site {domain}: {values}")  # Log de depuração
+        self.refresh()
+        self.changed_callback()
+
+    def remove_rule(self):
+        item = self.rules_tree.currentItem()
+        domain = item.text(0) if item is not None else self.normalize_domain(self.domain_input.text())
+        if domain and self.store.remove(domain):
+            print(f"Configurações do site {domain} removidas")  # Log de depuração
+            self.refresh()
+            self.changed_callback()
 
 class SettingsDialog(QDialog):
-    def __init__(self, settings_file, parent=None):
+    def __init__(self, settings_file, parent=None, clear_cache_callback=None, site_settings_callback=None):
         super().__init__(parent)
         self.setWindowTitle("Configurações")
         self.setMinimumSize(400, 400)
@@ -120,12 +1473,178 @@ class SettingsDialog(QDialog):
         self.whitelist_enabled_input.setChecked(self.settings.get("whitelist_enabled", True))
         layout.addWidget(self.whitelist_enabled_input)
         
-        self.save_mode_label = QLabel("Modo de Salvamento de blocked_sites.json:")
-        layout.addWidget(self.save_mode_label)
-        self.save_mode_input = QComboBox()
-        self.save_mode_input.addItems(["Incremental", "Único"])
-        self.save_mode_input.setCurrentText(self.settings.get("save_mode", "Incremental"))
-        layout.addWidget(self.save_mode_input)
+        
+        self.import_concurrency_label = QLabel("Importações Simultâneas de Listas:")
+        layout.addWidget(self.import_concurrency_label)
+        self.import_concurrency_input = QSpinBox()
+        self.import_concurrency_input.setRange(1, 8)
+        self.import_concurrency_input.setValue(self.settings.get("import_concurrency", 3))
+        layout.addWidget(self.import_concurrency_input)
+        
+        self.tab_freeze_after_label = QLabel("Congelar Abas em Segundo Plano Após (minutos, 0 = nunca):")
+        layout.addWidget(self.tab_freeze_after_label)
+        self.tab_freeze_after_input = QSpinBox()
+        self.tab_freeze_after_input.setRange(0, 240)
+        self.tab_freeze_after_input.setValue(self.settings.get("tab_freeze_after", 10))
+        layout.addWidget(self.tab_freeze_after_input)
+        
+        self.memory_budget_label = QLabel("Limite de Memória das Abas (MB, 0 = sem limite):")
+        layout.addWidget(self.memory_budget_label)
+        self.memory_budget_input = QSpinBox()
+        self.memory_budget_input.setRange(0, 65536)
+        self.memory_budget_input.setSingleStep(256)
+        self.memory_budget_input.setValue(self.settings.get("memory_budget_mb", 2048))
+        layout.addWidget(self.memory_budget_input)
+        
+        self.restore_session_label = QLabel("Sessão:")
+        layout.addWidget(self.restore_session_label)
+        self.restore_session_input = QCheckBox("Restaurar abas da sessão anterior")
+        self.restore_session_input.setChecked(self.settings.get("restore_session", True))
+        layout.addWidget(self.restore_session_input)
+        
+        self.default_cache_type_label = QLabel("Cache do Perfil Padrão (ativar ou desativar o Disco exige reiniciar o navegador):")
+        layout.addWidget(self.default_cache_type_label)
+        self.default_cache_type_input = QComboBox()
+        self.default_cache_type_input.addItems(list(CACHE_TYPES))
+        self.default_cache_type_input.setCurrentText(self.settings.get("default_cache_type", "Memória"))
+        layout.addWidget(self.default_cache_type_input)
+        
+        self.default_cache_path_label = QLabel("Pasta do Cache em Disco (vazio = padrão do Qt):")
+        layout.addWidget(self.default_cache_path_label)
+        self.default_cache_path_input = QLineEdit()
+        self.default_cache_path_input.setText(self.settings.get("default_cache_path", ""))
+        self.default_cache_path_input.setEnabled(self.default_cache_type_input.currentText() == "Disco")
+        layout.addWidget(self.default_cache_path_input)
+        
+        self.default_cache_size_label = QLabel("Tamanho Máximo do Cache Padrão (MB, 0 = automático):")
+        layout.addWidget(self.default_cache_size_label)
+        self.default_cache_size_input = QSpinBox()
+        self.default_cache_size_input.setRange(0, 10240)
+        self.default_cache_size_input.setValue(self.settings.get("default_cache_size_mb", 0))
+        layout.addWidget(self.default_cache_size_input)
+        
+        self.private_cache_type_label = QLabel("Cache do Perfil Anônimo:")
+        layout.addWidget(self.private_cache_type_label)
+        self.private_cache_type_input = QComboBox()
+        self.private_cache_type_input.addItems([name for name in CACHE_TYPES if name != "Disco"])
+        self.private_cache_type_input.setCurrentText(self.settings.get("private_cache_type", "Memória"))
+        layout.addWidget(self.private_cache_type_input)
+        
+        self.private_cache_size_label = QLabel("Tamanho Máximo do Cache Anônimo (MB, 0 = automático):")
+        layout.addWidget(self.private_cache_size_label)
+        self.private_cache_size_input = QSpinBox()
+        self.private_cache_size_input.setRange(0, 2048)
+        self.private_cache_size_input.setValue(self.settings.get("private_cache_size_mb", 64))
+        layout.addWidget(self.private_cache_size_input)
+        
+        self.warmup_enabled_label = QLabel("Pré-conexão:")
+        layout.addWidget(self.warmup_enabled_label)
+        self.warmup_enabled_input = QCheckBox("Pré-resolver DNS e pré-conectar a favoritos e sites frequentes")
+        self.warmup_enabled_input.setChecked(self.settings.get("warmup_enabled", True))
+        layout.addWidget(self.warmup_enabled_input)
+        
+        self.warmup_origins_label = QLabel("Sites Pré-conectados ao Iniciar:")
+        layout.addWidget(self.warmup_origins_label)
+        self.warmup_origins_input = QSpinBox()
+        self.warmup_origins_input.setRange(0, 20)
+        self.warmup_origins_input.setValue(self.settings.get("warmup_origins", 6))
+        layout.addWidget(self.warmup_origins_input)
+        
+        self.process_model_label = QLabel("Modelo de Processos do Renderizador (requer reiniciar):")
+        layout.addWidget(self.process_model_label)
+        self.process_model_input = QComboBox()
+        self.process_model_input.addItems(list(PROCESS_MODELS))
+        self.process_model_input.setCurrentText(self.settings.get("process_model", "Por instância de site (padrão)"))
+        layout.addWidget(self.process_model_input)
+        
+        self.renderer_process_limit_label = QLabel("Limite de Processos de Renderização (0 = automático, requer reiniciar):")
+        layout.addWidget(self.renderer_process_limit_label)
+        self.renderer_process_limit_input = QSpinBox()
+        self.renderer_process_limit_input.setRange(0, 64)
+        self.renderer_process_limit_input.setValue(self.settings.get("renderer_process_limit", 0))
+        layout.addWidget(self.renderer_process_limit_input)
+        
+        self.gpu_label = QLabel("Aceleração Gráfica (requer reiniciar):")
+        layout.addWidget(self.gpu_label)
+        self.disable_gpu_rasterization_input = QCheckBox("Desativar rasterização por GPU")
+        self.disable_gpu_rasterization_input.setChecked(self.settings.get("disable_gpu_rasterization", False))
+        layout.addWidget(self.disable_gpu_rasterization_input)
+        self.disable_gpu_input = QCheckBox("Desativar GPU (ambientes só com renderização por software)")
+        self.disable_gpu_input.setChecked(self.settings.get("disable_gpu", False))
+        layout.addWidget(self.disable_gpu_input)
+        
+        self.extra_chromium_flags_label = QLabel("Flags Adicionais do Chromium (separadas por espaço, requer reiniciar):")
+        layout.addWidget(self.extra_chromium_flags_label)
+        self.extra_chromium_flags_input = QLineEdit()
+        self.extra_chromium_flags_input.setText(self.settings.get("extra_chromium_flags", ""))
+        layout.addWidget(self.extra_chromium_flags_input)
+        
+        self.console_silenced_label = QLabel("Mensagens do Console Ignoradas (um trecho por linha):")
+        layout.addWidget(self.console_silenced_label)
+        self.console_silenced_input = QPlainTextEdit()
+        self.console_silenced_input.setPlainText("\n".join(self.settings.get("console_silenced_patterns", DEFAULT_CONSOLE_SILENCED)))
+        self.console_silenced_input.setMaximumHeight(100)
+        layout.addWidget(self.console_silenced_input)
+        
+        self.console_rate_limit_label = QLabel("Limite de Mensagens do Console por Fonte (por segundo, 0 = sem limite):")
+        layout.addWidget(self.console_rate_limit_label)
+        self.console_rate_limit_input = QSpinBox()
+        self.console_rate_limit_input.setRange(0, 1000)
+        self.console_rate_limit_input.setValue(self.settings.get("console_rate_limit", 20))
+        layout.addWidget(self.console_rate_limit_input)
+        
+        self.cosmetic_filtering_label = QLabel("Filtragem Cosmética:")
+        layout.addWidget(self.cosmetic_filtering_label)
+        self.cosmetic_filtering_input = QCheckBox("Ocultar elementos de página com regras ## das listas importadas")
+        self.cosmetic_filtering_input.setChecked(self.settings.get("cosmetic_filtering", True))
+        layout.addWidget(self.cosmetic_filtering_input)
+        
+        self.view_pool_size_label = QLabel("Abas Pré-carregadas por Perfil (0 = desativado):")
+        layout.addWidget(self.view_pool_size_label)
+        self.view_pool_size_input = QSpinBox()
+        self.view_pool_size_input.setRange(0, 4)
+        self.view_pool_size_input.setValue(self.settings.get("view_pool_size", 1))
+        layout.addWidget(self.view_pool_size_input)
+        
+        self.request_log_enabled_label = QLabel("Registro de Requisições:")
+        layout.addWidget(self.request_log_enabled_label)
+        self.request_log_enabled_input = QCheckBox("Gravar todas as requisições em request_logs/ (para diagnóstico)")
+        self.request_log_enabled_input.setChecked(self.settings.get("request_log_enabled", False))
+        layout.addWidget(self.request_log_enabled_input)
+        self.request_log_format_input = QComboBox()
+        self.request_log_format_input.addItems(list(REQUEST_LOG_FORMATS))
+        self.request_log_format_input.setCurrentText(self.settings.get("request_log_format", "JSONL"))
+        layout.addWidget(self.request_log_format_input)
+        self.request_log_max_mb_label = QLabel("Tamanho Máximo de Cada Arquivo de Registro (MB):")
+        layout.addWidget(self.request_log_max_mb_label)
+        self.request_log_max_mb_input = QSpinBox()
+        self.request_log_max_mb_input.setRange(1, 1024)
+        self.request_log_max_mb_input.setValue(self.settings.get("request_log_max_mb", 10))
+        layout.addWidget(self.request_log_max_mb_input)
+        
+        if clear_cache_callback:
+            clear_cache_layout = QHBoxLayout()
+            self.clear_default_cache_button = QPushButton("Limpar Cache do Perfil Padrão")
+            self.clear_default_cache_button.clicked.connect(lambda: clear_cache_callback("default"))
+            clear_cache_layout.addWidget(self.clear_default_cache_button)
+            self.clear_private_cache_button = QPushButton("Limpar Cache do Perfil Anônimo")
+            self.clear_private_cache_button.clicked.connect(lambda: clear_cache_callback("private"))
+            clear_cache_layout.addWidget(self.clear_private_cache_button)
+            layout.addLayout(clear_cache_layout)
+        
+        if site_settings_callback:
+            self.site_settings_button = QPushButton("Configurações por Site...")
+            self.site_settings_button.clicked.connect(lambda: site_settings_callback())
+            layout.addWidget(self.site_settings_button)
+        
+        # As opções ficam numa área rolável; os botões permanecem sempre visíveis
+        content = QWidget()
+        content.setLayout(layout)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(content)
+        dialog_layout = QVBoxLayout()
+        dialog_layout.addWidget(scroll_area)
         
         button_layout = QHBoxLayout()
         self.save_button = QPushButton("Salvar")
@@ -136,10 +1655,11 @@ class SettingsDialog(QDialog):
         self.cancel_button.clicked.connect(self.reject)
         button_layout.addWidget(self.cancel_button)
         
-        layout.addLayout(button_layout)
-        self.setLayout(layout)
+        dialog_layout.addLayout(button_layout)
+        self.setLayout(dialog_layout)
         
         self.validation_mode_input.currentTextChanged.connect(self.toggle_custom_validation)
+        self.default_cache_type_input.currentTextChanged.connect(lambda cache_type: self.default_cache_path_input.setEnabled(cache_type == "Disco"))
 
     def load_settings(self):
         default_settings = {
@@ -152,7 +1672,29 @@ class SettingsDialog(QDialog):
             "sleep_time": 5,
             "rejected_limit": 5,
             "whitelist_enabled": True,
-            "save_mode": "Incremental"
+            "import_concurrency": 3,
+            "tab_freeze_after": 10,
+            "memory_budget_mb": 2048,
+            "restore_session": True,
+            "default_cache_type": "Memória",
+            "default_cache_path": "",
+            "default_cache_size_mb": 0,
+            "private_cache_type": "Memória",
+            "private_cache_size_mb": 64,
+            "warmup_enabled": True,
+            "warmup_origins": 6,
+            "process_model": "Por instância de site (padrão)",
+            "renderer_process_limit": 0,
+            "disable_gpu_rasterization": False,
+            "disable_gpu": False,
+            "extra_chromium_flags": "",
+            "console_silenced_patterns": list(DEFAULT_CONSOLE_SILENCED),
+            "console_rate_limit": 20,
+            "cosmetic_filtering": True,
+            "view_pool_size": 1,
+            "request_log_enabled": False,
+            "request_log_format": "JSONL",
+            "request_log_max_mb": 10
         }
         try:
             if not os.path.exists(self.settings_file):
@@ -169,6 +1711,8 @@ class SettingsDialog(QDialog):
             with open(self.settings_file, "r") as f:
                 data = json.load(f)
                 if isinstance(data, dict):
+                    for key in OBSOLETE_SETTINGS:
+                        data.pop(key, None)
                     return data
                 print(f"Erro: {self.settings_file} contém dados inválidos. Retornando configurações padrão.")
                 return default_settings
@@ -177,7 +1721,9 @@ class SettingsDialog(QDialog):
             return default_settings
 
     def save_settings(self):
-        settings = {
+        # Preserva chaves que não são editadas neste diálogo
+        settings = dict(self.settings)
+        settings.update({
             "max_domains": self.max_domains_input.value(),
             "batch_size": self.batch_size_input.value(),
             "validation_mode": self.validation_mode_input.currentText(),
@@ -187,8 +1733,30 @@ class SettingsDialog(QDialog):
             "sleep_time": self.sleep_time_input.value(),
             "rejected_limit": self.rejected_limit_input.value(),
             "whitelist_enabled": self.whitelist_enabled_input.isChecked(),
-            "save_mode": self.save_mode_input.currentText()
-        }
+            "import_concurrency": self.import_concurrency_input.value(),
+            "tab_freeze_after": self.tab_freeze_after_input.value(),
+            "memory_budget_mb": self.memory_budget_input.value(),
+            "restore_session": self.restore_session_input.isChecked(),
+            "default_cache_type": self.default_cache_type_input.currentText(),
+            "default_cache_path": self.default_cache_path_input.text().strip(),
+            "default_cache_size_mb": self.default_cache_size_input.value(),
+            "private_cache_type": self.private_cache_type_input.currentText(),
+            "private_cache_size_mb": self.private_cache_size_input.value(),
+            "warmup_enabled": self.warmup_enabled_input.isChecked(),
+            "warmup_origins": self.warmup_origins_input.value(),
+            "process_model": self.process_model_input.currentText(),
+            "renderer_process_limit": self.renderer_process_limit_input.value(),
+            "disable_gpu_rasterization": self.disable_gpu_rasterization_input.isChecked(),
+            "disable_gpu": self.disable_gpu_input.isChecked(),
+            "extra_chromium_flags": self.extra_chromium_flags_input.text().strip(),
+            "console_silenced_patterns": [line.strip() for line in self.console_silenced_input.toPlainText().splitlines() if line.strip()],
+            "console_rate_limit": self.console_rate_limit_input.value(),
+            "cosmetic_filtering": self.cosmetic_filtering_input.isChecked(),
+            "view_pool_size": self.view_pool_size_input.value(),
+            "request_log_enabled": self.request_log_enabled_input.isChecked(),
+            "request_log_format": self.request_log_format_input.currentText(),
+            "request_log_max_mb": self.request_log_max_mb_input.value()
+        })
         try:
             with open(self.settings_file, "w") as f:
                 json.dump(settings, f, indent=4)
@@ -200,37 +1768,157 @@ class SettingsDialog(QDialog):
     def toggle_custom_validation(self, mode):
         self.custom_validation_url_input.setEnabled(mode == "Personalizada")
 
+class DomainStore:
+    def __init__(self, items):
+        # A lista é compartilhada com o bloqueador, os diálogos e os workers de importação
+        self.items = items
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def batch(self):
+        return DomainStoreBatch(self)
+
+    def apply(self, add=(), remove=()):
+        remove = set(remove)
+        present = set(self.items)
+        removed = [domain for domain in remove if domain in present]
+        if removed:
+            self.items[:] = [domain for domain in self.items if domain not in remove]
+            present.difference_update(remove)
+        added = []
+        for domain in add:
+            if domain not in present:
+                present.add(domain)
+                added.append(domain)
+        self.items.extend(added)
+        if added or removed:
+            for listener in list(self.listeners):
+                listener(added, removed)
+        return added, removed
+
+class DomainStoreBatch:
+    def __init__(self, store):
+        self.store = store
+        self.added = {}
+        self.removed = set()
+        self.result = ([], [])
+
+    def add(self, domain):
+        self.removed.discard(domain)
+        self.added[domain] = None
+
+    def remove(self, domain):
+        self.added.pop(domain, None)
+        self.removed.add(domain)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Alterações só são aplicadas (e persistidas) se o bloco terminar sem exceção
+        if exc_type is None:
+            self.result = self.store.apply(self.added, self.removed)
+        return False
+
 class ListImportWorker(QObject):
     progress = pyqtSignal(int, str)
-    finished = pyqtSignal(int, str, list)
+    # (domínios novos, mensagem, total de rejeitados, amostra de rejeitados)
+    finished = pyqtSignal(list, str, int, list)
     error = pyqtSignal(str)
+    cosmetic_rules_found = pyqtSignal(list)
+    REJECTED_SAMPLE = 50
+    # A URL da lista é registrada em blocked_lists pelo diálogo ao fim da importação
+    remember_source = True
 
-    def __init__(self, list_url, blocked_sites, blocked_lists, blocked_sites_file, whitelist, settings):
+    def __init__(self, list_url, whitelist, settings, shared_known=None):
         super().__init__()
         self.list_url = list_url
-        self.blocked_sites = blocked_sites
-        self.blocked_lists = blocked_lists
-        self.blocked_sites_file = blocked_sites_file
+        # Cópia da whitelist feita pelo diálogo; o worker nunca lê as listas vivas do Browser
         self.whitelist = whitelist
         self.settings = settings
         self.cancelled = False
         self.MAX_DOMAINS = self.settings.get("max_domains", 50000)
         self.BATCH_SIZE = self.settings.get("batch_size", 200)
+        # Só uma amostra dos rejeitados é guardada; o total fica em rejected_count
+        self.rejected_count = 0
         self.rejected_domains = []
+        # Domínios novos desta lista; aplicados à lista de bloqueio pelo diálogo, no fim da rodada
+        self.new_domains = []
+        # Conjunto (e trava) de domínios já conhecidos, compartilhado entre os workers de uma mesma fila
+        self.shared_known = shared_known
+        self.known_domains = shared_known[0] if shared_known else set()
+        self.known_lock = shared_known[1] if shared_known else threading.Lock()
+        self.domain_count = 0
+        self.added_count = 0
+        # Regras cosméticas (##) encontradas em listas Adblock Plus
+        self.cosmetic_rules = []
+        # Só listas no formato Adblock Plus (cabeçalho [Adblock ...]) têm regras cosméticas
+        self.abp_list = False
 
     def cancel(self):
         self.cancelled = True
 
+    def collect_line(self, line, batch, adblock_support):
+        if adblock_support and line.startswith("[") and "adblock" in line.lower():
+            self.abp_list = True
+            return False
+        if self.abp_list and "#" in line:
+            rule = parse_cosmetic_rule(line)
+            if rule:
+                self.cosmetic_rules.append(rule)
+                return False
+        domain = extract_list_domain(line, adblock_support)
+        if domain:
+            normalized = self.normalize_domain(domain)
+            if normalized:
+                with self.known_lock:
+                    if normalized in self.known_domains:
+                        return False
+                    self.known_domains.add(normalized)
+                batch.add(normalized)
+                self.domain_count += 1
+                return True
+        return False
+
+    def flush_batch(self, batch):
+        self.new_domains.extend(batch)
+        self.added_count += len(batch)
+        batch.clear()
+
+    def reject(self, domain):
+        self.rejected_count += 1
+        if len(self.rejected_domains) < self.REJECTED_SAMPLE:
+            self.rejected_domains.append(domain)
+
+    def emit_finished(self, message):
+        self.finished.emit(self.new_domains, message, self.rejected_count, self.rejected_domains)
+
+    def emit_cosmetic_rules(self):
+        if self.cosmetic_rules:
+            self.cosmetic_rules_found.emit(self.cosmetic_rules)
+
+    def finish_cancelled(self, batch):
+        if batch:
+            self.flush_batch(batch)
+        self.emit_cosmetic_rules()
+        self.emit_finished(f"Importação cancelada ({self.added_count} domínios lidos).")
+
     def normalize_domain(self, domain):
         domain = domain.strip().lower()
         domain = re.sub(r'^https?://', '', domain)
         domain = domain.split('/')[0]
         if not domain or domain.startswith('localhost'):
-            self.rejected_domains.append(domain)
+            self.reject(domain)
             print(f"Aviso: Domínio inválido rejeitado: {domain}")
             return None
         if self.settings.get("whitelist_enabled", True) and domain in self.whitelist:
-            self.rejected_domains.append(domain)
+            self.reject(domain)
             print(f"Aviso: Domínio na whitelist rejeitado: {domain}")
             return None
         if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain):
@@ -239,7 +1927,7 @@ class ListImportWorker(QObject):
             try:
                 domain = idna.encode(domain).decode('ascii')
             except idna.IDNAError:
-                self.rejected_domains.append(domain)
+                self.reject(domain)
                 print(f"Aviso: Falha ao converter IDN: {domain}")
                 return None
         validation_mode = self.settings.get("validation_mode", "Rigorosa")
@@ -249,34 +1937,10 @@ class ListImportWorker(QObject):
             return domain
         if re.match(r'^[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]*)*\.[a-z0-9]{1,}$', domain):
             return domain
-        self.rejected_domains.append(domain)
+        self.reject(domain)
         print(f"Aviso: Domínio inválido rejeitado: {domain}")
         return None
 
-    def append_to_blocked_sites_file(self, domains):
-        if self.settings.get("save_mode", "Incremental") == "Incremental":
-            try:
-                if not os.path.exists(self.blocked_sites_file):
-                    with open(self.blocked_sites_file, 'w') as f:
-                        json.dump([], f)
-                with open(self.blocked_sites_file, 'r+') as f:
-                    data = json.load(f)
-                    if not isinstance(data, list):
-                        data = []
-                    data.extend(domains)
-                    f.seek(0)
-                    json.dump(data, f, indent=4)
-                    f.truncate()
-            except IOError as e:
-                print(f"Erro ao salvar domínios em {self.blocked_sites_file}: {e}")
-
-    def save_all_domains(self, domains):
-        try:
-            with open(self.blocked_sites_file, 'w') as f:
-                json.dump(domains, f, indent=4)
-        except IOError as e:
-            print(f"Erro ao salvar domínios em {self.blocked_sites_file}: {e}")
-
     def run(self):
         try:
             if not self.list_url.startswith("http://") and not self.list_url.startswith("https://"):
@@ -285,13 +1949,8 @@ class ListImportWorker(QObject):
                 self.error.emit("URL inválida para a lista de bloqueio.")
                 return
 
-            if self.list_url not in self.blocked_lists:
-                self.blocked_lists.append(self.list_url)
-
             is_url_list = self.list_url.endswith('.txt')
-            new_domains = []
-            domain_count = 0
-            added_count = 0
+            adblock_support = self.settings.get("adblock_support", False)
             batch = set()
 
             self.progress.emit(0, "Baixando lista principal...")
@@ -307,50 +1966,27 @@ class ListImportWorker(QObject):
                             reader = TextIOWrapper(response, encoding='utf-8')
                             for line in reader:
                                 if self.cancelled:
-                                    if batch:
-                                        self.append_to_blocked_sites_file(list(batch))
-                                    self.finished.emit(added_count, "Importação cancelada.", self.rejected_domains)
+                                    self.finish_cancelled(batch)
                                     return
-                                line = line.strip()
                                 processed_lines += 1
-                                if line and not line.startswith('#') and not line.startswith('!'):
-                                    parts = line.split()
-                                    domain = None
-                                    if self.settings.get("adblock_support", False) and line.startswith('||') and line.endswith('^'):
-                                        domain = line[2:-1].strip()
-                                    elif len(parts) >= 2 and parts[0] in ('0.0.0.0', '127.0.0.1'):
-                                        domain = parts[1].strip()
-                                    elif len(parts) == 1:
-                                        domain = parts[0].strip()
-                                    if domain:
-                                        normalized = self.normalize_domain(domain)
-                                        if normalized and normalized not in batch and normalized not in self.blocked_sites:
-                                            batch.add(normalized)
-                                            domain_count += 1
-                                            if len(batch) >= self.BATCH_SIZE:
-                                                self.blocked_sites.extend(batch)
-                                                self.append_to_blocked_sites_file(list(batch))
-                                                added_count += len(batch)
-                                                batch.clear()
-                                                progress = min(100, int((processed_lines / total_lines) * 100))
-                                                self.progress.emit(progress, f"Processando domínio {domain_count}/{total_lines}")
-                                                QThread.msleep(self.settings.get("sleep_time", 5))
-                                            if domain_count >= self.MAX_DOMAINS:
-                                                self.progress.emit(100, f"Limite de {self.MAX_DOMAINS} domínios atingido.")
-                                                break
+                                if self.collect_line(line, batch, adblock_support):
+                                    if len(batch) >= self.BATCH_SIZE:
+                                        self.flush_batch(batch)
+                                        progress = min(100, int((processed_lines / total_lines) * 100))
+                                        self.progress.emit(progress, f"Processando domínio {self.domain_count}/{total_lines}")
+                                        QThread.msleep(self.settings.get("sleep_time", 5))
+                                    if self.domain_count >= self.MAX_DOMAINS:
+                                        self.progress.emit(100, f"Limite de {self.MAX_DOMAINS} domínios atingido.")
+                                        break
                             if batch:
-                                self.blocked_sites.extend(batch)
-                                self.append_to_blocked_sites_file(list(batch))
-                                added_count += len(batch)
+                                self.flush_batch(batch)
                         else:
                             content = response.read().decode('utf-8')
                             lines = [line.strip() for line in content.splitlines() if line.startswith('http')]
                             total_urls = len(lines)
                             for i, url in enumerate(lines):
                                 if self.cancelled:
-                                    if batch:
-                                        self.append_to_blocked_sites_file(list(batch))
-                                    self.finished.emit(added_count, "Importação cancelada.", self.rejected_domains)
+                                    self.finish_cancelled(batch)
                                     return
                                 if not QUrl(url).isValid():
                                     print(f"Aviso: URL inválida ignorada: {url}")
@@ -358,48 +1994,33 @@ class ListImportWorker(QObject):
                                 self.progress.emit(int((i / total_urls) * 50), f"Processando sublista {i + 1}/{total_urls}")
                                 for attempt in range(retries):
                                     try:
+                                        # Cada sublista declara o próprio formato
+                                        self.abp_list = False
                                         with urllib.request.urlopen(url) as sub_response:
                                             sub_reader = TextIOWrapper(sub_response, encoding='utf-8')
                                             for line in sub_reader:
                                                 if self.cancelled:
-                                                    if batch:
-                                                        self.append_to_blocked_sites_file(list(batch))
-                                                    self.finished.emit(added_count, "Importação cancelada.", self.rejected_domains)
+                                                    self.finish_cancelled(batch)
                                                     return
-                                                line = line.strip()
-                                                if line and not line.startswith('#') and not line.startswith('!'):
-                                                    parts = line.split()
-                                                    domain = None
-                                                    if self.settings.get("adblock_support", False) and line.startswith('||') and line.endswith('^'):
-                                                        domain = line[2:-1].strip()
-                                                    elif len(parts) >= 2 and parts[0] in ('0.0.0.0', '127.0.0.1'):
-                                                        domain = parts[1].strip()
-                                                    elif len(parts) == 1:
-                                                        domain = parts[0].strip()
-                                                    if domain:
-                                                        normalized = self.normalize_domain(domain)
-                                                        if normalized and normalized not in batch and normalized not in self.blocked_sites:
-                                                            batch.add(normalized)
-                                                            domain_count += 1
-                                                            if len(batch) >= self.BATCH_SIZE:
-                                                                self.blocked_sites.extend(batch)
-                                                                self.append_to_blocked_sites_file(list(batch))
-                                                                added_count += len(batch)
-                                                                batch.clear()
-                                                                progress = 50 + int(((i + 1) / total_urls) * 50)
-                                                                self.progress.emit(progress, f"Processando domínio {domain_count}")
-                                                                QThread.msleep(self.settings.get("sleep_time", 5))
-                                                            if domain_count >= self.MAX_DOMAINS:
-                                                                self.progress.emit(100, f"Limite de {self.MAX_DOMAINS} domínios atingido.")
-                                                                break
+                                                if self.collect_line(line, batch, adblock_support):
+                                                    if len(batch) >= self.BATCH_SIZE:
+                                                        self.flush_batch(batch)
+                                                        progress = 50 + int(((i + 1) / total_urls) * 50)
+                                                        self.progress.emit(progress, f"Processando domínio {self.domain_count}")
+                                                        QThread.msleep(self.settings.get("sleep_time", 5))
+                                                    if self.domain_count >= self.MAX_DOMAINS:
+                                                        self.progress.emit(100, f"Limite de {self.MAX_DOMAINS} domínios atingido.")
+                                                        break
                                             break
                                     except urllib.error.URLError as e:
                                         if attempt == retries - 1:
                                             print(f"Erro ao processar URL {url} após {retries} tentativas: {e}")
                                         QThread.msleep(1000)
                                         continue
-                                if domain_count >= self.MAX_DOMAINS:
+                                if self.domain_count >= self.MAX_DOMAINS:
                                     break
+                            if batch:
+                                self.flush_batch(batch)
                         break
                 except urllib.error.URLError as e:
                     if attempt == retries - 1:
@@ -408,34 +2029,123 @@ class ListImportWorker(QObject):
                     QThread.msleep(1000)
                     continue
 
-            if domain_count == 0:
+            if self.domain_count == 0 and not self.cosmetic_rules:
                 self.error.emit("Nenhum domínio válido encontrado na lista.")
                 return
 
-            if self.settings.get("save_mode", "Incremental") == "Único" and new_domains:
-                self.blocked_sites.extend(new_domains)
-                self.save_all_domains(self.blocked_sites)
-
-            self.finished.emit(added_count, f"{added_count} domínios adicionados à lista de bloqueio.", self.rejected_domains)
+            self.emit_cosmetic_rules()
+            self.emit_finished(f"{self.added_count} domínios novos encontrados.")
         except Exception as e:
             self.error.emit(f"Falha ao importar lista de bloqueio: {e}")
 
+class LocalListImportWorker(ListImportWorker):
+    # Libera as páginas já lidas do mapeamento a cada 64 MB
+    RELEASE_CHUNK = 64 * 1024 * 1024
+    remember_source = False
+
+    def __init__(self, file_path, list_format, whitelist, settings, shared_known=None):
+        super().__init__(file_path, whitelist, settings, shared_known)
+        self.list_format = list_format
+        self.abp_list = list_format == "abp"
+
+    def run(self):
+        try:
+            total_size = os.path.getsize(self.list_url)
+            if total_size == 0:
+                self.error.emit("O arquivo selecionado está vazio.")
+                return
+            adblock_support = self.list_format == "abp" or self.settings.get("adblock_support", False)
+            batch = set()
+            released = 0
+            self.progress.emit(0, "Lendo arquivo local...")
+            with open(self.list_url, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                for raw_line in iter(mapped.readline, b""):
+                    if self.cancelled:
+                        self.finish_cancelled(batch)
+                        return
+                    if self.collect_line(raw_line.decode("utf-8", errors="replace"), batch, adblock_support):
+                        if len(batch) >= self.BATCH_SIZE:
+                            self.flush_batch(batch)
+                            position = mapped.tell()
+                            self.progress.emit(min(100, int(position * 100 / total_size)), f"Processando domínio {self.domain_count}")
+                            if hasattr(mmap, "MADV_DONTNEED") and position - released >= self.RELEASE_CHUNK:
+                                released = position - position % mmap.PAGESIZE
+                                mapped.madvise(mmap.MADV_DONTNEED, 0, released)
+                            QThread.msleep(self.settings.get("sleep_time", 5))
+                        if self.domain_count >= self.MAX_DOMAINS:
+                            self.progress.emit(100, f"Limite de {self.MAX_DOMAINS} domínios atingido.")
+                            break
+            if batch:
+                self.flush_batch(batch)
+            if self.domain_count == 0 and not self.cosmetic_rules:
+                self.error.emit("Nenhum domínio válido encontrado no arquivo.")
+                return
+            self.emit_cosmetic_rules()
+            self.emit_finished(f"{self.added_count} domínios novos encontrados.")
+        except (IOError, OSError, ValueError) as e:
+            self.error.emit(f"Falha ao importar arquivo local: {e}")
+
+class ImportJobRow(QWidget):
+    def __init__(self, label, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.name_label = QLabel(label)
+        self.name_label.setWordWrap(True)
+        layout.addWidget(self.name_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximum(100)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("Na fila...")
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+
+    def update_progress(self, value, message):
+        self.progress_bar.setValue(value)
+        self.status_label.setText(message)
+
+    def set_done(self, message):
+        self.progress_bar.setValue(100)
+        self.status_label.setText(message)
+
 class ImportBlockListsDialog(QDialog):
-    def __init__(self, import_callback, blocked_sites, blocked_lists, blocked_sites_file, whitelist, settings, parent=None):
+    # Threads de importação vivas (thread -> worker), mantidas até terminarem mesmo que o diálogo seja fechado
+    live_threads = {}
+
+    def __init__(self, import_callback, blocked_sites_store, blocked_lists, whitelist, settings, parent=None, cosmetic_callback=None):
         super().__init__(parent)
         self.setWindowTitle("Importar Listas de Bloqueio")
-        self.setMinimumSize(400, 300)
+        self.cosmetic_callback = cosmetic_callback
+        self.cosmetic_rules = []
+        self.setMinimumSize(500, 400)
         self.import_callback = import_callback
-        self.blocked_sites = blocked_sites
+        self.blocked_sites_store = blocked_sites_store
         self.blocked_lists = blocked_lists
-        self.blocked_sites_file = blocked_sites_file
         self.whitelist = whitelist
         self.settings = settings
-        self.worker_thread = None
+        # Fila de importações pendentes e workers em execução (worker -> (thread, linha))
+        self.pending_jobs = deque()
+        self.running_jobs = {}
+        self.shared_known = None
+        self.whitelist_snapshot = set()
+        self.closing = False
+        self.total_jobs = 0
+        self.completed_jobs = 0
+        self.total_added = 0
+        self.failed_jobs = 0
+        self.rejected_count = 0
+        self.rejected_domains = []
+        # Domínios novos de todos os workers da rodada, aplicados de uma vez em job_done
+        self.new_domains = []
+        self.lists_changed = False
+        self.cosmetic_count = 0
 
         layout = QVBoxLayout()
-        self.url_input = QLineEdit()
-        self.url_input.setPlaceholderText("Digite a URL da lista de bloqueio (ex: https://raw.githubusercontent.com/PolishFiltersTeam/KADhosts/master/KADhosts.txt)")
+        self.url_input = QPlainTextEdit()
+        self.url_input.setPlaceholderText("Digite uma ou mais URLs de listas de bloqueio, uma por linha (ex: https://raw.githubusercontent.com/PolishFiltersTeam/KADhosts/master/KADhosts.txt)")
+        self.url_input.setMaximumHeight(100)
         layout.addWidget(self.url_input)
 
         self.progress_bar = QProgressBar()
@@ -446,16 +2156,34 @@ class ImportBlockListsDialog(QDialog):
         self.status_label = QLabel("Pronto para importar.")
         layout.addWidget(self.status_label)
 
+        self.jobs_widget = QWidget()
+        self.jobs_layout = QVBoxLayout()
+        self.jobs_layout.addStretch()
+        self.jobs_widget.setLayout(self.jobs_layout)
+        self.jobs_area = QScrollArea()
+        self.jobs_area.setWidgetResizable(True)
+        self.jobs_area.setWidget(self.jobs_widget)
+        layout.addWidget(self.jobs_area)
+
         self.rejected_label = QLabel("")
         self.rejected_label.setWordWrap(True)
         self.rejected_label.setVisible(False)
         layout.addWidget(self.rejected_label)
 
         button_layout = QHBoxLayout()
-        self.import_button = QPushButton("Importar Lista")
+        self.import_button = QPushButton("Importar Listas")
         self.import_button.clicked.connect(self.start_import)
         button_layout.addWidget(self.import_button)
 
+        self.reimport_button = QPushButton("Reimportar Todas")
+        self.reimport_button.setEnabled(bool(self.blocked_lists))
+        self.reimport_button.clicked.connect(self.reimport_all)
+        button_layout.addWidget(self.reimport_button)
+
+        self.import_file_button = QPushButton("Importar Arquivo Local...")
+        self.import_file_button.clicked.connect(self.start_file_import)
+        button_layout.addWidget(self.import_file_button)
+
         self.cancel_button = QPushButton("Cancelar")
         self.cancel_button.clicked.connect(self.cancel_import)
         self.cancel_button.setEnabled(False)
@@ -469,72 +2197,287 @@ class ImportBlockListsDialog(QDialog):
         self.setLayout(layout)
 
     def start_import(self):
-        url = self.url_input.text().strip()
-        if not url:
+        urls = []
+        for line in self.url_input.toPlainText().splitlines():
+            url = line.strip()
+            if url and url not in urls:
+                urls.append(url)
+        if not urls:
             QMessageBox.warning(self, "Erro", "Por favor, insira uma URL.")
             return
-        self.url_input.setEnabled(False)
-        self.import_button.setEnabled(False)
-        self.cancel_button.setEnabled(True)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
-        self.status_label.setText("Iniciando importação...")
-        self.rejected_label.setVisible(False)
+        self.queue_imports([(url, self.create_url_worker) for url in urls])
 
-        self.worker_thread = QThread()
-        self.worker = ListImportWorker(url, self.blocked_sites, self.blocked_lists, self.blocked_sites_file, self.whitelist, self.settings)
-        self.worker.moveToThread(self.worker_thread)
-        self.worker.progress.connect(self.update_progress)
-        self.worker.finished.connect(self.import_finished)
-        self.worker.error.connect(self.import_error)
-        self.worker_thread.started.connect(self.worker.run)
-        self.worker_thread.start()
+    def reimport_all(self):
+        self.queue_imports([(url, self.create_url_worker) for url in list(self.blocked_lists)])
 
-    def update_progress(self, value, message):
-        self.progress_bar.setValue(value)
-        self.status_label.setText(message)
-
-    def import_finished(self, count, message, rejected_domains):
-        self.progress_bar.setValue(100)
-        self.status_label.setText(message)
-        if rejected_domains:
-            rejected_limit = self.settings.get("rejected_limit", 5)
-            self.rejected_label.setText(f"Domínios rejeitados ({len(rejected_domains)}): {', '.join(rejected_domains[:rejected_limit])}{'...' if len(rejected_domains) > rejected_limit else ''}")
-            self.rejected_label.setVisible(True)
-        self.import_callback()
-        self.cleanup_thread()
-        QMessageBox.information(self, "Sucesso", message)
+    def start_file_import(self):
+        filters = {
+            "Arquivo hosts (*.hosts *.txt *)": "hosts",
+            "Um domínio por linha (*.txt *.list *)": "plain",
+            "Lista Adblock Plus (*.txt *)": "abp",
+        }
+        file_name, selected_filter = QFileDialog.getOpenFileName(self, "Importar Arquivo Local", "", ";;".join(filters))
+        if file_name:
+            list_format = filters.get(selected_filter, "hosts")
+            self.queue_imports([(file_name, lambda path: self.create_file_worker(path, list_format))])
+
+    def create_url_worker(self, url):
+        return ListImportWorker(url, self.whitelist_snapshot, self.settings, self.shared_known)
+
+    def create_file_worker(self, file_name, list_format):
+        return LocalListImportWorker(file_name, list_format, self.whitelist_snapshot, self.settings, self.shared_known)
+
+    def queue_imports(self, jobs):
+        if not self.running_jobs and not self.pending_jobs:
+            # Nova rodada: um único conjunto de domínios conhecidos para todos os workers
+            self.shared_known = (set(self.blocked_sites_store.items), threading.Lock())
+            self.whitelist_snapshot = set(self.whitelist)
+            self.total_jobs = 0
+            self.completed_jobs = 0
+            self.total_added = 0
+            self.failed_jobs = 0
+            self.rejected_count = 0
+            self.rejected_domains = []
+            self.new_domains = []
+            self.cosmetic_rules = []
+            self.rejected_label.setVisible(False)
+            self.progress_bar.setValue(0)
+            self.progress_bar.setVisible(True)
+        for label, factory in jobs:
+            row = ImportJobRow(label)
+            self.jobs_layout.insertWidget(self.jobs_layout.count() - 1, row)
+            self.pending_jobs.append((label, factory, row))
+        self.total_jobs += len(jobs)
+        self.url_input.clear()
+        self.cancel_button.setEnabled(True)
+        self.start_pending_jobs()
+
+    def start_pending_jobs(self):
+        concurrency = max(1, self.settings.get("import_concurrency", 3))
+        while self.pending_jobs and len(self.running_jobs) < concurrency:
+            label, factory, row = self.pending_jobs.popleft()
+            worker = factory(label)
+            thread = QThread()
+            worker.moveToThread(thread)
+            worker.progress.connect(row.update_progress)
+            worker.finished.connect(self.import_finished)
+            worker.error.connect(self.import_error)
+            worker.cosmetic_rules_found.connect(self.collect_cosmetic_rules)
+            thread.started.connect(worker.run)
+            thread.finished.connect(lambda thread=thread: ImportBlockListsDialog.release_thread(thread))
+            ImportBlockListsDialog.live_threads[thread] = worker
+            self.running_jobs[worker] = (thread, row)
+            row.update_progress(0, "Iniciando importação...")
+            thread.start()
+        self.update_status()
+
+    def update_status(self):
+        if self.total_jobs:
+            self.progress_bar.setValue(int(self.completed_jobs * 100 / self.total_jobs))
+        self.status_label.setText(
+            f"{self.completed_jobs}/{self.total_jobs} lista(s) concluída(s), {len(self.running_jobs)} em andamento, "
+            f"{len(self.pending_jobs)} na fila. {self.total_added} domínio(s) adicionado(s)."
+        )
+
+    def collect_cosmetic_rules(self, rules):
+        self.cosmetic_rules.extend(rules)
+
+    def import_finished(self, new_domains, message, rejected_count, rejected_domains):
+        if self.closing:
+            return
+        worker = self.sender()
+        row = self.finish_job(worker)
+        if row:
+            row.set_done(message)
+        if worker.remember_source and worker.list_url not in self.blocked_lists:
+            self.blocked_lists.append(worker.list_url)
+            self.lists_changed = True
+        self.new_domains.extend(new_domains)
+        self.total_added += len(new_domains)
+        self.rejected_count += rejected_count
+        rejected_limit = self.settings.get("rejected_limit", 5)
+        self.rejected_domains.extend(rejected_domains[:max(0, rejected_limit - len(self.rejected_domains))])
+        self.job_done()
 
     def import_error(self, message):
-        self.status_label.setText("Erro na importação.")
-        self.rejected_label.setVisible(False)
-        self.cleanup_thread()
-        QMessageBox.warning(self, "Erro", message)
+        if self.closing:
+            return
+        worker = self.sender()
+        row = self.finish_job(worker)
+        if row:
+            row.status_label.setText(f"Erro: {message}")
+        self.failed_jobs += 1
+        self.job_done()
+
+    def finish_job(self, worker):
+        # Sem wait(): a thread termina sozinha e é liberada por release_thread
+        thread, row = self.running_jobs.pop(worker, (None, None))
+        if thread:
+            thread.quit()
+        return row
+
+    @staticmethod
+    def release_thread(thread):
+        worker = ImportBlockListsDialog.live_threads.pop(thread, None)
+        if worker is not None:
+            worker.deleteLater()
+        thread.deleteLater()
+
+    @classmethod
+    def wait_for_imports(cls, timeout_ms=5000):
+        # Chamado no encerramento do navegador, quando bloquear a interface já não importa
+        for thread, worker in list(cls.live_threads.items()):
+            worker.cancel()
+            thread.quit()
+            thread.wait(timeout_ms)
+
+    def job_done(self):
+        self.completed_jobs += 1
+        self.start_pending_jobs()
+        if self.running_jobs or self.pending_jobs:
+            return
+        # Último worker da rodada: o bloqueador é atualizado uma única vez
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        if self.rejected_count:
+            self.rejected_label.setText(f"Domínios rejeitados ({self.rejected_count}): {', '.join(self.rejected_domains)}{'...' if self.rejected_count > len(self.rejected_domains) else ''}")
+            self.rejected_label.setVisible(True)
+        self.reimport_button.setEnabled(bool(self.blocked_lists))
+        self.commit_results()
+        message = f"{self.total_added} domínios adicionados à lista de bloqueio a partir de {self.total_jobs} lista(s)."
+        if self.cosmetic_count:
+            message += f" {self.cosmetic_count} regra(s) de ocultação de elementos importada(s)."
+        if self.failed_jobs:
+            message += f" {self.failed_jobs} lista(s) falharam."
+        self.status_label.setText(message)
+        QMessageBox.information(self, "Importação Concluída", message)
+
+    def commit_results(self):
+        # Uma única aplicação à lista: o bloqueador é reindexado e o arquivo gravado (via PersistenceService) uma vez
+        added, _ = self.blocked_sites_store.apply(add=self.new_domains)
+        self.new_domains = []
+        self.total_added = len(added)
+        self.cosmetic_count = len(self.cosmetic_rules)
+        if self.cosmetic_rules and self.cosmetic_callback:
+            self.cosmetic_callback(self.cosmetic_rules)
+        self.cosmetic_rules = []
+        if self.lists_changed:
+            self.import_callback()
+            self.lists_changed = False
 
     def cancel_import(self):
-        if self.worker_thread and self.worker:
-            self.worker.cancel()
+        while self.pending_jobs:
+            _, _, row = self.pending_jobs.popleft()
+            row.status_label.setText("Cancelada.")
+            self.completed_jobs += 1
+        for worker in self.running_jobs:
+            worker.cancel()
+        if self.running_jobs:
             self.status_label.setText("Cancelando importação...")
-            self.cancel_button.setEnabled(False)
-
-    def cleanup_thread(self):
-        if self.worker_thread:
-            self.worker_thread.quit()
-            self.worker_thread.wait()
-            self.worker_thread = None
-            self.worker = None
-        self.url_input.setEnabled(True)
-        self.import_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
-        self.progress_bar.setVisible(False)
+
+    def stop_jobs(self):
+        # Workers em andamento são cancelados e desligados do diálogo; o que já foi concluído na rodada é aplicado
+        self.closing = True
+        self.cancel_import()
+        for worker in list(self.running_jobs):
+            for signal in (worker.progress, worker.finished, worker.error, worker.cosmetic_rules_found):
+                try:
+                    signal.disconnect()
+                except TypeError:
+                    pass
+            self.finish_job(worker)
+        self.commit_results()
 
     def close_dialog(self):
-        if self.worker_thread and self.worker_thread.isRunning():
-            self.cancel_import()
+        self.stop_jobs()
         self.accept()
 
+    def reject(self):
+        self.stop_jobs()
+        super().reject()
+
+class DomainListModel(QAbstractListModel):
+    FETCH_BATCH = 500
+
+    def __init__(self, items, parent=None):
+        super().__init__(parent)
+        self.items = items
+        self.filter_text = ""
+        # Texto de todos os itens concatenado em minúsculas e o deslocamento inicial de cada linha
+        self.haystack = None
+        self.starts = None
+        self.matches = None
+        self.search_position = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.items) if self.matches is None else len(self.matches)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.item_at(index.row())
+        return None
+
+    def item_at(self, row):
+        return self.items[row] if self.matches is None else self.items[self.matches[row]]
+
+    def build_index(self):
+        self.haystack = "\n".join(self.items).lower() + "\n"
+        self.starts = []
+        offset = 0
+        for item in self.items:
+            self.starts.append(offset)
+            offset += len(item) + 1
+
+    def find_matches(self, count):
+        found = []
+        position = self.search_position
+        while position is not None and len(found) < count:
+            hit = self.haystack.find(self.filter_text, position)
+            if hit < 0:
+                position = None
+                break
+            row = bisect.bisect_right(self.starts, hit) - 1
+            found.append(row)
+            position = self.starts[row + 1] if row + 1 < len(self.starts) else None
+        self.search_position = position
+        return found
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.search_position is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.search_position is None:
+            return
+        found = self.find_matches(self.FETCH_BATCH)
+        if found:
+            self.beginInsertRows(QModelIndex(), len(self.matches), len(self.matches) + len(found) - 1)
+            self.matches.extend(found)
+            self.endInsertRows()
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter_text = text
+        if not text:
+            self.matches = None
+            self.search_position = None
+        else:
+            if self.haystack is None:
+                self.build_index()
+            self.search_position = 0
+            self.matches = []
+            self.matches = self.find_matches(self.FETCH_BATCH)
+        self.endResetModel()
+
+    def refresh(self):
+        self.haystack = None
+        self.starts = None
+        self.set_filter(self.filter_text)
+
 class ManageBlockedSitesDialog(QDialog):
-    def __init__(self, blocked_sites, blocked_lists, whitelist, remove_site_callback, remove_list_callback, add_to_whitelist_callback, remove_from_whitelist_callback, parent=None):
+    def __init__(self, blocked_sites, blocked_lists, whitelist, remove_sites_callback, remove_list_callback, add_to_whitelist_callback, remove_from_whitelist_callback, move_to_whitelist_callback, parent=None):
         super().__init__(parent)
         print("Inicializando ManageBlockedSitesDialog")  # Log de depuração
         self.setWindowTitle("Gerenciar Sites e Listas")
@@ -542,40 +2485,51 @@ class ManageBlockedSitesDialog(QDialog):
         self.blocked_sites = blocked_sites or []
         self.blocked_lists = blocked_lists or []
         self.whitelist = whitelist or []
-        self.remove_site_callback = remove_site_callback
+        self.remove_sites_callback = remove_sites_callback
         self.remove_list_callback = remove_list_callback
         self.add_to_whitelist_callback = add_to_whitelist_callback
         self.remove_from_whitelist_callback = remove_from_whitelist_callback
+        self.move_to_whitelist_callback = move_to_whitelist_callback
 
         layout = QVBoxLayout()
         
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Digite para filtrar sites, listas ou whitelist...")
-        self.search_input.textChanged.connect(self.filter_lists)
+        self.search_input.textChanged.connect(self.schedule_filter)
         layout.addWidget(self.search_input)
-        
+
+        # Filtragem só depois de uma pausa na digitação
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(lambda: self.filter_lists(self.search_input.text()))
+
         self.sites_label = QLabel("Sites Bloqueados:")
         layout.addWidget(self.sites_label)
-        self.sites_list_widget = QListWidget()
-        self.sites_list_widget.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
-        layout.addWidget(self.sites_list_widget)
-        
+        self.sites_model = DomainListModel(self.blocked_sites, self)
+        self.sites_list_view = self.create_list_view(self.sites_model)
+        layout.addWidget(self.sites_list_view)
+
         self.lists_label = QLabel("Listas de Bloqueio Importadas:")
         layout.addWidget(self.lists_label)
-        self.lists_list_widget = QListWidget()
-        self.lists_list_widget.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
-        layout.addWidget(self.lists_list_widget)
+        self.lists_model = DomainListModel(self.blocked_lists, self)
+        self.lists_list_view = self.create_list_view(self.lists_model)
+        layout.addWidget(self.lists_list_view)
 
         self.whitelist_label = QLabel("Lista de Permissões (Whitelist):")
         layout.addWidget(self.whitelist_label)
-        self.whitelist_list_widget = QListWidget()
-        self.whitelist_list_widget.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
-        layout.addWidget(self.whitelist_list_widget)
+        self.whitelist_model = DomainListModel(self.whitelist, self)
+        self.whitelist_list_view = self.create_list_view(self.whitelist_model)
+        layout.addWidget(self.whitelist_list_view)
 
         self.remove_site_button = QPushButton("Remover Site Selecionado")
         self.remove_site_button.clicked.connect(self.remove_selected_site)
         layout.addWidget(self.remove_site_button)
 
+        self.move_to_whitelist_button = QPushButton("Mover Sites Selecionados para a Whitelist")
+        self.move_to_whitelist_button.clicked.connect(self.move_selected_to_whitelist)
+        layout.addWidget(self.move_to_whitelist_button)
+
         self.add_to_whitelist_button = QPushButton("Adicionar Site à Whitelist")
         self.add_to_whitelist_button.clicked.connect(self.add_to_whitelist)
         layout.addWidget(self.add_to_whitelist_button)
@@ -596,61 +2550,59 @@ class ManageBlockedSitesDialog(QDialog):
         self.update_lists()
         print("ManageBlockedSitesDialog inicializado com sucesso")  # Log de depuração
 
+    def create_list_view(self, model):
+        view = QListView()
+        view.setModel(model)
+        # Altura uniforme: a view só consulta as linhas visíveis
+        view.setUniformItemSizes(True)
+        view.setSelectionMode(QListView.SelectionMode.MultiSelection)
+        return view
+
+    def selected_items(self, view):
+        model = view.model()
+        return [model.item_at(index.row()) for index in view.selectionModel().selectedIndexes()]
+
+    def update_buttons(self):
+        self.remove_site_button.setEnabled(bool(self.sites_model.rowCount()))
+        self.move_to_whitelist_button.setEnabled(bool(self.sites_model.rowCount()))
+        self.remove_list_button.setEnabled(bool(self.lists_model.rowCount()))
+        self.remove_from_whitelist_button.setEnabled(bool(self.whitelist_model.rowCount()))
+
     def update_lists(self):
         print(f"Atualizando listas: blocked_sites={len(self.blocked_sites)}, blocked_lists={len(self.blocked_lists)}, whitelist={len(self.whitelist)}")  # Log de depuração
-        self.sites_list_widget.clear()
-        for url in self.blocked_sites:
-            self.sites_list_widget.addItem(url)
-        self.lists_list_widget.clear()
-        for list_url in self.blocked_lists:
-            item = QListWidgetItem(list_url)
-            self.lists_list_widget.addItem(item)
-        self.whitelist_list_widget.clear()
-        for url in self.whitelist:
-            self.whitelist_list_widget.addItem(url)
-        self.remove_site_button.setEnabled(bool(self.sites_list_widget.count()))
-        self.remove_list_button.setEnabled(bool(self.lists_list_widget.count()))
-        self.remove_from_whitelist_button.setEnabled(bool(self.whitelist_list_widget.count()))
-        print("Listas atualizadas na UI")  # Log de depuração
+        self.sites_model.refresh()
+        self.lists_model.refresh()
+        self.whitelist_model.refresh()
+        self.update_buttons()
+
+    def schedule_filter(self, text):
+        self.filter_timer.start()
 
     def filter_lists(self, text):
         print(f"Filtrando listas com texto: {text}")  # Log de depuração
         text = text.lower().strip()
-        self.sites_list_widget.clear()
-        self.lists_list_widget.clear()
-        self.whitelist_list_widget.clear()
-        
-        # Filtrar sites bloqueados
-        for url in self.blocked_sites:
-            if not text or text in url.lower():
-                self.sites_list_widget.addItem(url)
-        
-        # Filtrar listas de bloqueio
-        for list_url in self.blocked_lists:
-            if not text or text in list_url.lower():
-                item = QListWidgetItem(list_url)
-                self.lists_list_widget.addItem(item)
-        
-        # Filtrar whitelist
-        for url in self.whitelist:
-            if not text or text in url.lower():
-                self.whitelist_list_widget.addItem(url)
-        
-        self.remove_site_button.setEnabled(bool(self.sites_list_widget.count()))
-        self.remove_list_button.setEnabled(bool(self.lists_list_widget.count()))
-        self.remove_from_whitelist_button.setEnabled(bool(self.whitelist_list_widget.count()))
-        print("Listas filtradas na UI")  # Log de depuração
+        self.sites_model.set_filter(text)
+        self.lists_model.set_filter(text)
+        self.whitelist_model.set_filter(text)
+        self.update_buttons()
 
     def remove_selected_site(self):
         print("Botão Remover Site Selecionado clicado")  # Log de depuração
-        selected_items = self.sites_list_widget.selectedItems()
-        if selected_items:
-            removed_urls = [item.text() for item in selected_items]
-            for url in removed_urls:
-                self.remove_site_callback(url)
+        removed_urls = self.selected_items(self.sites_list_view)
+        if removed_urls:
+            self.remove_sites_callback(removed_urls)
             self.update_lists()
             QMessageBox.information(self, "Sites Removidos", f"{len(removed_urls)} site(s) removido(s) da lista de bloqueio.")
 
+    def move_selected_to_whitelist(self):
+        print("Botão Mover Sites Selecionados para a Whitelist clicado")  # Log de depuração
+        domains = self.selected_items(self.sites_list_view)
+        if domains:
+            self.move_to_whitelist_callback(domains)
+            self.sites_list_view.clearSelection()
+            self.update_lists()
+            QMessageBox.information(self, "Whitelist", f"{len(domains)} site(s) movido(s) da lista de bloqueio para a whitelist.")
+
     def add_to_whitelist(self):
         print("Botão Adicionar Site à Whitelist clicado")  # Log de depuração
         url, ok = QInputDialog.getText(self, "Adicionar à Whitelist", "Digite o domínio para adicionar à whitelist (ex: alohafromdeer.com):")
@@ -663,101 +2615,1435 @@ class ManageBlockedSitesDialog(QDialog):
 
     def remove_from_whitelist(self):
         print("Botão Remover Site da Whitelist clicado")  # Log de depuração
-        selected_items = self.whitelist_list_widget.selectedItems()
-        if selected_items:
-            removed_urls = [item.text() for item in selected_items]
-            for url in removed_urls:
-                self.remove_from_whitelist_callback(url)
+        removed_urls = self.selected_items(self.whitelist_list_view)
+        if removed_urls:
+            self.remove_from_whitelist_callback(removed_urls)
             self.update_lists()
             QMessageBox.information(self, "Whitelist", f"{len(removed_urls)} site(s) removido(s) da whitelist.")
 
-    def remove_selected_list(self):
-        print("Botão Remover Lista Selecionada clicado")  # Log de depuração
-        selected_items = self.lists_list_widget.selectedItems()
-        if selected_items:
-            removed_urls = [item.text() for item in selected_items]
-            for url in removed_urls:
-                self.remove_list_callback(url)
-            self.update_lists()
-            QMessageBox.information(self, "Listas Removidas", f"{len(removed_urls)} lista(s) removida(s).")
+    def remove_selected_list(self):
+        print("Botão Remover Lista Selecionada clicado")  # Log de depuração
+        removed_urls = self.selected_items(self.lists_list_view)
+        if removed_urls:
+            for url in removed_urls:
+                self.remove_list_callback(url)
+            self.update_lists()
+            QMessageBox.information(self, "Listas Removidas", f"{len(removed_urls)} lista(s) removida(s).")
+
+    def normalize_domain(self, domain):
+        domain = domain.strip().lower()
+        domain = re.sub(r'^https?://', '', domain)
+        domain = domain.split('/')[0]
+        if not domain or domain.startswith('localhost'):
+            return None
+        if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain):
+            return domain
+        if any(ord(c) > 127 for c in domain):
+            try:
+                domain = idna.encode(domain).decode('ascii')
+            except idna.IDNAError:
+                return None
+        if re.match(r'^[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]*)*\.[a-z0-9]{1,}$', domain):
+            return domain
+        return None
+
+BLOCK_PAGE_SCHEME = b"blocked"
+
+def register_block_page_scheme():
+    # Precisa ser chamado antes de criar a QApplication
+    scheme = QWebEngineUrlScheme(BLOCK_PAGE_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+class BlockPageSchemeHandler(QWebEngineUrlSchemeHandler):
+    # Corpo estático montado uma única vez; o domínio é lido da própria URL (blocked://<domínio>)
+    BODY = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Site Bloqueado</title></head>
+<body style='background-color: #f5f5f5; color: #333333; text-align: center; padding: 50px; font-family: sans-serif;'>
+    <h1>Site Bloqueado</h1>
+    <p>Este site está na lista de bloqueio.</p>
+    <p id="host" style="color: #777777;"></p>
+    <script>document.getElementById("host").textContent = location.hostname;</script>
+</body>
+</html>
+""".encode("utf-8")
+
+    def requestStarted(self, job):
+        buffer = QBuffer(job)
+        buffer.setData(self.BODY)
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(b"text/html", buffer)
+
+class DomainBlocker(QWebEngineUrlRequestInterceptor):
+    # Decisões em cache por site principal: no máximo MAX_FIRST_PARTIES sites e MAX_HOSTS_PER_PAGE hosts por site
+    MAX_FIRST_PARTIES = 64
+    MAX_HOSTS_PER_PAGE = 1024
+
+    def __init__(self, blocked_domains, whitelist, settings):
+        super().__init__()
+        self.blocked_domains = blocked_domains
+        self.whitelist = whitelist
+        self.settings = settings
+        # Índices montados fora do caminho crítico da inicialização; até lá usa a busca linear
+        self.blocked_index = None
+        self.whitelist_index = None
+        self.stats = {"requests": 0, "blocked_navigations": 0, "blocked_subresources": 0, "cache_hits": 0, "cache_misses": 0}
+        # Host do site principal -> {host requisitado: domínio bloqueado ou None}
+        self.decision_cache = OrderedDict()
+        # RequestRecorder opcional (registro de requisições em arquivo)
+        self.recorder = None
+
+    def rebuild_index(self):
+        self.blocked_index = {urlparse(blocked).netloc.lower() or blocked.lower() for blocked in self.blocked_domains}
+        self.blocked_index.discard("")
+        self.whitelist_index = set(self.whitelist)
+        self.decision_cache.clear()
+
+    def set_blocked_domains(self, blocked_domains):
+        self.blocked_domains = blocked_domains
+        self.decision_cache.clear()
+        if self.blocked_index is not None:
+            self.rebuild_index()
+
+    def set_whitelist(self, whitelist):
+        self.whitelist = whitelist
+        self.decision_cache.clear()
+        if self.whitelist_index is not None:
+            self.whitelist_index = set(whitelist)
+
+    def set_settings(self, settings):
+        self.settings = settings
+        self.decision_cache.clear()
+
+    def forget_first_party(self, url):
+        self.decision_cache.pop(url.host(QUrl.ComponentFormattingOption.FullyEncoded).lower(), None)
+
+    def page_navigated(self, previous_url, url):
+        # Um novo carregamento começa do zero, tanto para o site anterior quanto para o novo
+        self.forget_first_party(previous_url)
+        self.forget_first_party(url)
+
+    def decide(self, first_party, domain):
+        page_cache = self.decision_cache.get(first_party)
+        if page_cache is None:
+            page_cache = self.decision_cache[first_party] = {}
+            if len(self.decision_cache) > self.MAX_FIRST_PARTIES:
+                self.decision_cache.popitem(last=False)
+        else:
+            self.decision_cache.move_to_end(first_party)
+            if domain in page_cache:
+                self.stats["cache_hits"] += 1
+                return page_cache[domain]
+        self.stats["cache_misses"] += 1
+        whitelist = self.whitelist_index if self.whitelist_index is not None else self.whitelist
+        if self.settings.get("whitelist_enabled", True) and domain in whitelist:
+            blocked_domain = None
+        else:
+            blocked_domain = self.find_blocked_domain(domain)
+        if len(page_cache) >= self.MAX_HOSTS_PER_PAGE:
+            page_cache.clear()
+        page_cache[domain] = blocked_domain
+        return blocked_domain
+
+    def cached_decision(self, first_party, domain):
+        # Consulta sem efeito nas estatísticas; decide() acabou de preencher o cache para esta requisição
+        page_cache = self.decision_cache.get(first_party)
+        return page_cache.get(domain) if page_cache else None
+
+    def find_blocked_domain(self, domain):
+        if self.blocked_index is None:
+            for blocked in self.blocked_domains:
+                blocked_domain = urlparse(blocked).netloc.lower() or blocked.lower()
+                if blocked_domain and (blocked_domain == domain or domain.endswith('.' + blocked_domain)):
+                    return blocked_domain
+            return None
+        candidate = domain
+        while candidate:
+            if candidate in self.blocked_index:
+                return candidate
+            dot = candidate.find('.')
+            if dot < 0:
+                return None
+            candidate = candidate[dot + 1:]
+        return None
+
+    def interceptRequest(self, info):
+        self.handle_request(info, True)
+
+    def handle_request(self, info, recordable):
+        # Roda no caminho de cada requisição: nenhum trabalho de interface aqui
+        request_url = info.requestUrl()
+        if request_url.scheme() == BLOCK_PAGE_SCHEME.decode():
+            return
+        self.stats["requests"] += 1
+        # Forma ACE (punycode), a mesma usada nas listas de bloqueio e na whitelist
+        domain = request_url.host(QUrl.ComponentFormattingOption.FullyEncoded).lower()
+        first_party = info.firstPartyUrl().host(QUrl.ComponentFormattingOption.FullyEncoded).lower()
+        blocked_domain = self.decide(first_party, domain)
+        if self.recorder is not None and recordable:
+            main_frame = info.resourceType() == QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame
+            self.recorder.record(
+                request_url.toString(),
+                bytes(info.requestMethod()).decode("ascii", "replace"),
+                info.resourceType().name.replace("ResourceType", ""),
+                info.firstPartyUrl().toString(),
+                ("redirected" if main_frame else "blocked") if blocked_domain else "allowed"
+            )
+        if blocked_domain:
+            if info.resourceType() == QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame:
+                self.stats["blocked_navigations"] += 1
+                info.redirect(QUrl(f"{BLOCK_PAGE_SCHEME.decode()}://{domain}"))
+                print(f"Bloqueando navegação: {request_url.toString()} (domínio: {blocked_domain})")
+            else:
+                self.stats["blocked_subresources"] += 1
+                info.block(True)
+
+class PageRequestMeter(QWebEngineUrlRequestInterceptor):
+    # Instalado em cada página: o Qt o chama depois do interceptador do perfil e só com as requisições desta aba
+    def __init__(self, blocker, metrics, page):
+        super().__init__(page)
+        self.blocker = blocker
+        self.metrics = metrics
+        self.page = page
+
+    def interceptRequest(self, info):
+        request_url = info.requestUrl()
+        if request_url.scheme() == BLOCK_PAGE_SCHEME.decode():
+            return
+        domain = request_url.host(QUrl.ComponentFormattingOption.FullyEncoded).lower()
+        first_party = info.firstPartyUrl().host(QUrl.ComponentFormattingOption.FullyEncoded).lower()
+        blocked = self.blocker.cached_decision(first_party, domain) is not None
+        self.metrics.record_request(self.page, info.resourceType(), domain, blocked)
+
+class PrivateRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    # Perfil privado: mesmo bloqueio e mesmos índices do DomainBlocker, mas nada é gravado no registro em disco
+    def __init__(self, blocker):
+        super().__init__()
+        self.blocker = blocker
+
+    def interceptRequest(self, info):
+        self.blocker.handle_request(info, False)
+
+REQUEST_LOG_FORMATS = {"JSONL": ".jsonl", "HAR": ".har"}
+
+class RequestLogWriter(QObject):
+    # Roda na thread do RequestRecorder: todo o acesso a disco do registro de requisições fica aqui
+    KEEP_FILES = 5
+
+    def __init__(self, buffer, directory, log_format, max_bytes):
+        super().__init__()
+        self.buffer = buffer
+        self.directory = directory
+        self.log_format = log_format
+        self.max_bytes = max_bytes
+        self.file = None
+        self.entries_in_file = 0
+        # Requisições já retiradas do buffer que não puderam ser gravadas
+        self.lost = 0
+
+    @staticmethod
+    def har_entry(record):
+        timestamp, url, method, resource_type, first_party, verdict = record
+        started = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}Z"
+        return {
+            "startedDateTime": started,
+            "time": 0,
+            "request": {"method": method, "url": url, "httpVersion": "", "cookies": [], "headers": [], "queryString": [], "headersSize": -1, "bodySize": -1},
+            "response": {"status": 0, "statusText": "", "httpVersion": "", "cookies": [], "headers": [], "content": {"size": 0, "mimeType": ""}, "redirectURL": "", "headersSize": -1, "bodySize": -1},
+            "cache": {},
+            "timings": {"send": 0, "wait": 0, "receive": 0},
+            "_resourceType": resource_type,
+            "_firstParty": first_party,
+            "_verdict": verdict,
+        }
+
+    def open_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        name = time.strftime("requests-%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}" + REQUEST_LOG_FORMATS[self.log_format]
+        self.file = open(os.path.join(self.directory, name), "w", encoding="utf-8")
+        self.entries_in_file = 0
+        if self.log_format == "HAR":
+            self.file.write('{"log": {"version": "1.2", "creator": {"name": "LukeBrowser", "version": "1.0"}, "entries": [\n')
+        self.remove_old_files()
+
+    def close_file(self):
+        if self.file is None:
+            return
+        file, self.file = self.file, None
+        # O arquivo é fechado mesmo se a gravação do fim do HAR falhar
+        try:
+            with file:
+                if self.log_format == "HAR":
+                    file.write("\n]}}\n")
+        except OSError as e:
+            print(f"Erro ao fechar registro de requisições: {e}")
+
+    def remove_old_files(self):
+        suffix = REQUEST_LOG_FORMATS[self.log_format]
+        files = sorted(name for name in os.listdir(self.directory) if name.startswith("requests-") and name.endswith(suffix))
+        for name in files[:-self.KEEP_FILES]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def drain(self):
+        lines = []
+        while True:
+            try:
+                record = self.buffer.popleft()
+            except IndexError:
+                break
+            if self.log_format == "HAR":
+                lines.append(json.dumps(self.har_entry(record), separators=(",", ":")))
+            else:
+                timestamp, url, method, resource_type, first_party, verdict = record
+                lines.append(json.dumps({"time": timestamp, "url": url, "method": method, "type": resource_type, "first_party": first_party, "verdict": verdict}, separators=(",", ":")))
+        if not lines:
+            return
+        written = 0
+        try:
+            for line in lines:
+                if self.file is None:
+                    self.open_file()
+                if self.log_format == "HAR":
+                    self.file.write((",\n" if self.entries_in_file else "") + line)
+                else:
+                    self.file.write(line + "\n")
+                self.entries_in_file += 1
+                written += 1
+                if self.file.tell() >= self.max_bytes:
+                    self.close_file()
+            if self.file is not None:
+                self.file.flush()
+        except OSError as e:
+            self.lost += len(lines) - written
+            print(f"Erro ao gravar registro de requisições: {e} ({len(lines) - written} requisição(ões) perdida(s))")
+            self.close_file()
+
+class RequestRecorder(QObject):
+    # Alimentado pelo interceptador: só acrescenta ao buffer circular, nunca toca no disco
+    CAPACITY = 20000
+    FLUSH_INTERVAL = 1000
+    drain_requested = pyqtSignal()
+
+    def __init__(self, directory, log_format, max_bytes, parent=None):
+        super().__init__(parent)
+        # deque.append/popleft são atômicos: o interceptador e a thread de gravação não precisam de trava
+        self.buffer = deque(maxlen=self.CAPACITY)
+        self.log_format = log_format if log_format in REQUEST_LOG_FORMATS else "JSONL"
+        self.max_bytes = max_bytes
+        self.recorded = 0
+        self.dropped = 0
+        self.worker_thread = QThread()
+        self.worker = RequestLogWriter(self.buffer, directory, self.log_format, max_bytes)
+        self.worker.moveToThread(self.worker_thread)
+        self.drain_requested.connect(self.worker.drain)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.drain_requested.emit)
+        self.worker_thread.start()
+        self.timer.start(self.FLUSH_INTERVAL)
+        print(f"Registro de requisições ativado: {os.path.abspath(directory)} ({self.log_format})")  # Log de depuração
+
+    def record(self, url, method, resource_type, first_party, verdict):
+        if len(self.buffer) == self.CAPACITY:
+            # A gravação não acompanhou: a entrada mais antiga é descartada
+            self.dropped += 1
+        self.recorded += 1
+        self.buffer.append((time.time(), url, method, resource_type, first_party, verdict))
+
+    def stop(self):
+        # Encerra a thread e grava o que restou no buffer de forma síncrona
+        self.timer.stop()
+        if self.worker_thread.isRunning():
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+        self.worker.drain()
+        self.worker.close_file()
+        print(f"Registro de requisições encerrado: {self.recorded} requisições, {self.dropped + self.worker.lost} descartadas")  # Log de depuração
+
+def read_process_rss(pid):
+    # Memória residente (bytes) de um processo lida de /proc; 0 se indisponível
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def read_process_tree_rss(pid):
+    # Soma a memória do processo e de todos os seus descendentes (renderizadores, GPU, zygote)
+    total = read_process_rss(pid)
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return total
+    for tid in tids:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children = f.read().split()
+        except OSError:
+            continue
+        for child in children:
+            total += read_process_tree_rss(int(child))
+    return total
+
+class LeakTracker(QObject):
+    # Espera o processamento dos deleteLater antes de comparar as contagens
+    REPORT_DELAY = 1000
+
+    def __init__(self, enabled=False, parent=None):
+        super().__init__(parent)
+        self.enabled = enabled
+        self.report_on_close = True
+        self.live = {"view": 0, "page": 0}
+
+    @classmethod
+    def from_environment(cls, argv):
+        enabled = "--leak-check" in argv or os.environ.get("LUKEBROWSER_LEAK_CHECK", "0") not in ("", "0")
+        return cls(enabled)
+
+    def watch(self, web_view, page):
+        if not self.enabled:
+            return
+        self.live["view"] += 1
+        self.live["page"] += 1
+        web_view.destroyed.connect(lambda: self.released("view"))
+        page.destroyed.connect(lambda: self.released("page"))
+
+    def released(self, kind):
+        self.live[kind] -= 1
+
+    def check(self, open_tabs):
+        if not self.enabled:
+            return True
+        leaked = {kind: count - open_tabs for kind, count in self.live.items() if count != open_tabs}
+        if leaked:
+            print(f"Aviso: possível vazamento de abas: {self.live['view']} views e {self.live['page']} páginas vivas para {open_tabs} aba(s) abertas")
+        else:
+            print(f"Verificação de vazamento OK: {open_tabs} aba(s), {self.live['view']} views, {self.live['page']} páginas")  # Log de depuração
+        return not leaked
+
+class TabSoakTest(QObject):
+    WARMUP_CYCLES = 50
+    SETTLE_DELAY = 3000
+    MAX_GROWTH_MB = 64
+
+    def __init__(self, browser, cycles, parent=None):
+        super().__init__(parent)
+        self.browser = browser
+        self.cycles = cycles
+        self.done = 0
+        self.baseline = 0
+
+    @classmethod
+    def cycles_from_environment(cls, argv):
+        value = os.environ.get("LUKEBROWSER_SOAK_TABS", "0")
+        if "--soak-tabs" in argv:
+            position = argv.index("--soak-tabs")
+            value = argv[position + 1] if position + 1 < len(argv) else "1000"
+        try:
+            return max(0, int(value))
+        except ValueError:
+            return 0
+
+    def start(self):
+        print(f"Teste de estresse: abrindo e fechando {self.cycles} abas")  # Log de depuração
+        # Só interessa a contagem final, não a de cada fechamento
+        self.browser.leak_tracker.report_on_close = False
+        QTimer.singleShot(0, self.step)
+
+    def step(self):
+        if self.done >= self.cycles:
+            QTimer.singleShot(self.SETTLE_DELAY, self.finish)
+            return
+        web_view = self.browser.add_new_tab(QUrl("about:blank"), "Teste")
+        self.browser.close_tab(self.browser.tabs.indexOf(web_view))
+        self.done += 1
+        if self.done == min(self.WARMUP_CYCLES, self.cycles):
+            self.baseline = read_process_tree_rss(os.getpid())
+        # Um ciclo por volta do laço de eventos, para que os deleteLater sejam processados
+        QTimer.singleShot(0, self.step)
+
+    def finish(self):
+        final = read_process_tree_rss(os.getpid())
+        growth_mb = (final - self.baseline) / (1024 * 1024)
+        tabs_ok = self.browser.leak_tracker.check(self.browser.view_count())
+        memory_ok = growth_mb <= self.MAX_GROWTH_MB
+        print(f"Teste de estresse: {self.done} ciclos, memória {self.baseline // (1024 * 1024)} MB -> {final // (1024 * 1024)} MB ({growth_mb:+.1f} MB)")
+        print("Teste de estresse: OK" if tabs_ok and memory_ok else "Teste de estresse: FALHOU")
+        self.browser.close()
+        QApplication.instance().exit(0 if tabs_ok and memory_ok else 1)
+
+def serialize_web_history(history):
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.OpenModeFlag.WriteOnly)
+    stream << history
+    return bytes(data.toBase64()).decode("ascii")
+
+def restore_web_history(history, encoded):
+    # Restaurar o histórico já navega para a entrada atual
+    if not encoded:
+        return False
+    stream = QDataStream(QByteArray.fromBase64(encoded.encode("ascii")))
+    stream >> history
+    return stream.status() == QDataStream.Status.Ok and history.count() > 0
+
+class TabPlaceholder(QWidget):
+    # Aba restaurada que ainda não foi aberta: a QWebEngineView só é criada na primeira ativação
+    def __init__(self, url, title, history_data=None, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.title = title
+        self.history_data = history_data
+
+class TabLifecycleManager(QObject):
+    CHECK_INTERVAL = 30000
+
+    def __init__(self, tabs, settings, parent=None):
+        super().__init__(parent)
+        self.tabs = tabs
+        self.settings = settings
+        # Última ativação de cada aba (monotônico), usada para congelar e descartar as menos recentes
+        self.last_active = {}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check_tabs)
+        self.timer.start(self.CHECK_INTERVAL)
+
+    def track(self, web_view):
+        self.last_active[web_view] = time.monotonic()
+
+    def untrack(self, web_view):
+        self.last_active.pop(web_view, None)
+
+    def activate(self, web_view):
+        if web_view not in self.last_active:
+            return
+        self.last_active[web_view] = time.monotonic()
+        page = web_view.page()
+        state = page.lifecycleState()
+        if state != QWebEnginePage.LifecycleState.Active:
+            # Uma aba descartada é recarregada pelo próprio Qt ao voltar para Active
+            print(f"Reativando aba {'descartada' if state == QWebEnginePage.LifecycleState.Discarded else 'congelada'}: {web_view.url().toString()}")  # Log de depuração
+            page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+
+    def background_views(self):
+        current = self.tabs.currentWidget()
+        return [view for view in self.last_active if view is not current and not view.page().isVisible()]
+
+    def set_state(self, web_view, state):
+        index = self.tabs.indexOf(web_view)
+        tab_text = self.tabs.tabText(index)
+        web_view.page().setLifecycleState(state)
+        # Mantém título e URL na barra de abas mesmo sem o renderizador
+        if index >= 0:
+            self.tabs.setTabText(index, tab_text)
+            self.tabs.setTabToolTip(index, web_view.url().toString())
+
+    def check_tabs(self):
+        now = time.monotonic()
+        freeze_after = self.settings.get("tab_freeze_after", 10) * 60
+        candidates = []
+        for view in self.background_views():
+            page = view.page()
+            # O Qt recomenda Active para abas com áudio, DevTools ou carregamento pendente
+            if page.recommendedState() == QWebEnginePage.LifecycleState.Active:
+                continue
+            candidates.append(view)
+            if freeze_after and page.lifecycleState() == QWebEnginePage.LifecycleState.Active and now - self.last_active[view] >= freeze_after:
+                print(f"Congelando aba em segundo plano: {view.url().toString()}")  # Log de depuração
+                self.set_state(view, QWebEnginePage.LifecycleState.Frozen)
+        self.enforce_memory_budget(candidates)
+
+    def enforce_memory_budget(self, candidates):
+        budget = self.settings.get("memory_budget_mb", 2048) * 1024 * 1024
+        if not budget:
+            return
+        views_by_pid = {}
+        for view in self.last_active:
+            pid = view.page().renderProcessPid()
+            if pid > 0:
+                views_by_pid.setdefault(pid, []).append(view)
+        rss_by_pid = {pid: read_process_rss(pid) for pid in views_by_pid}
+        total = sum(rss_by_pid.values())
+        if total <= budget:
+            return
+        print(f"Memória das abas ({total // (1024 * 1024)} MB) acima do limite ({budget // (1024 * 1024)} MB)")  # Log de depuração
+        candidates = [view for view in candidates if view.page().lifecycleState() != QWebEnginePage.LifecycleState.Discarded]
+        candidates.sort(key=lambda view: self.last_active[view])
+        for view in candidates:
+            if total <= budget:
+                break
+            pid = view.page().renderProcessPid()
+            # Processos compartilhados entre abas: estima a parte liberada por esta aba
+            if pid in views_by_pid:
+                total -= rss_by_pid[pid] // len(views_by_pid[pid])
+            print(f"Descartando aba menos usada: {view.url().toString()}")  # Log de depuração
+            self.set_state(view, QWebEnginePage.LifecycleState.Discarded)
+
+PAGE_TIMING_SCRIPT_NAME = "lukebrowser-page-timing"
+
+# Injetado no mundo isolado da aplicação; ao fim do evento load guarda só um resumo compacto,
+# lido de volta por PAGE_TIMING_READ_SCRIPT
+PAGE_TIMING_SCRIPT = """
+(function () {
+    function summarize() {
+        var navigation = performance.getEntriesByType("navigation")[0];
+        var resources = performance.getEntriesByType("resource");
+        var transferred = navigation ? navigation.transferSize || 0 : 0;
+        for (var i = 0; i < resources.length; i++) {
+            transferred += resources[i].transferSize || 0;
+        }
+        var slowest = resources.slice().sort(function (a, b) { return b.duration - a.duration; }).slice(0, 10);
+        window.lukebrowserPageTiming = {
+            navigation: navigation ? {
+                ttfb: Math.round(navigation.responseStart - navigation.startTime),
+                dom_content_loaded: Math.round(navigation.domContentLoadedEventEnd - navigation.startTime),
+                load: Math.round((navigation.loadEventEnd || navigation.loadEventStart || performance.now()) - navigation.startTime),
+                size: navigation.transferSize || 0
+            } : null,
+            resource_count: resources.length,
+            transferred: transferred,
+            slowest: slowest.map(function (entry) {
+                return {name: entry.name, type: entry.initiatorType, duration: Math.round(entry.duration), size: entry.transferSize || 0};
+            })
+        };
+    }
+    if (document.readyState === "complete") {
+        summarize();
+    } else {
+        // setTimeout: loadEventEnd só é preenchido depois dos ouvintes de load
+        window.addEventListener("load", function () { setTimeout(summarize, 0); });
+    }
+})();
+"""
+
+PAGE_TIMING_READ_SCRIPT = "window.lukebrowserPageTiming || null"
+
+def install_page_timing_script(profile):
+    scripts = profile.scripts()
+    for script in scripts.find(PAGE_TIMING_SCRIPT_NAME):
+        scripts.remove(script)
+    script = QWebEngineScript()
+    script.setName(PAGE_TIMING_SCRIPT_NAME)
+    script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+    script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+    script.setRunsOnSubFrames(False)
+    script.setSourceCode(PAGE_TIMING_SCRIPT)
+    scripts.insert(script)
+
+class PageMetrics:
+    def __init__(self, capacity):
+        # Anel das últimas requisições: (tipo de recurso, host, bloqueada)
+        self.requests = deque(maxlen=capacity)
+        self.total_requests = 0
+        self.timing = None
+
+class NetworkMetrics:
+    MAX_PAGES = 64
+    RING_SIZE = 2000
+
+    def __init__(self):
+        # Aba (QWebEnginePage) -> PageMetrics; o interceptador só acrescenta, o painel agrega ao exibir
+        self.pages = OrderedDict()
+
+    def page(self, key):
+        metrics = self.pages.get(key)
+        if metrics is None:
+            metrics = self.pages[key] = PageMetrics(self.RING_SIZE)
+            if len(self.pages) > self.MAX_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(key)
+        return metrics
+
+    def record_request(self, key, resource_type, host, blocked):
+        # Sempre ativo e limitado pelo anel; agregação só acontece em summary(), com o painel aberto
+        metrics = self.page(key)
+        metrics.requests.append((resource_type, host, blocked))
+        metrics.total_requests += 1
+
+    def record_timing(self, key, timing):
+        if isinstance(timing, dict):
+            self.page(key).timing = timing
+
+    def reset(self, key):
+        self.pages.pop(key, None)
+
+    def summary(self, key):
+        metrics = self.pages.get(key)
+        if metrics is None:
+            return None
+        by_type = {}
+        blocked_hosts = {}
+        for resource_type, host, blocked in metrics.requests:
+            name = resource_type.name.replace("ResourceType", "") if hasattr(resource_type, "name") else str(resource_type)
+            counts = by_type.setdefault(name, [0, 0])
+            counts[0] += 1
+            if blocked:
+                counts[1] += 1
+                blocked_hosts[host] = blocked_hosts.get(host, 0) + 1
+        return {
+            "total": metrics.total_requests,
+            "sampled": len(metrics.requests),
+            "blocked": sum(counts[1] for counts in by_type.values()),
+            "by_type": sorted(by_type.items(), key=lambda item: item[1][0], reverse=True),
+            "blocked_hosts": sorted(blocked_hosts.items(), key=lambda item: item[1], reverse=True)[:10],
+            "timing": metrics.timing,
+        }
+
+class NetworkPanel(QDockWidget):
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self, metrics, current_page, read_timing, parent=None):
+        # current_page() devolve (página, host) da aba atual; read_timing(página) busca o resumo de tempos já medido
+        super().__init__("Rede e Desempenho", parent)
+        self.metrics = metrics
+        self.current_page = current_page
+        self.read_timing = read_timing
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        self.summary_label.setTextFormat(Qt.TextFormat.RichText)
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.summary_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(self.summary_label)
+        self.setWidget(scroll_area)
+        # Só atualiza enquanto visível; fechado, o painel não faz trabalho algum
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(self.REFRESH_INTERVAL)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        page, host = self.current_page()
+        summary = self.metrics.summary(page) if page is not None else None
+        if summary is None:
+            self.summary_label.setText("Nenhuma requisição registrada para esta aba.")
+            return
+        if summary["timing"] is None:
+            self.read_timing(page)
+        lines = [f"<b>{html.escape(host)}</b>"]
+        sampled = f" (últimas {summary['sampled']})" if summary["sampled"] < summary["total"] else ""
+        lines.append(f"Requisições: {summary['total']}{sampled}, bloqueadas: {summary['blocked']}")
+        lines.append("<table>" + "".join(
+            f"<tr><td>{html.escape(name)}</td><td align='right'>{counts[0]}</td><td align='right'>{counts[1]} bloq.</td></tr>"
+            for name, counts in summary["by_type"]
+        ) + "</table>")
+        timing = summary["timing"]
+        if timing:
+            navigation = timing.get("navigation") or {}
+            if navigation:
+                lines.append(
+                    f"Primeiro byte: {navigation.get('ttfb', 0):.0f} ms, DOMContentLoaded: {navigation.get('dom_content_loaded', 0):.0f} ms, "
+                    f"load: {navigation.get('load', 0):.0f} ms"
+                )
+            lines.append(f"Transferido: {timing.get('transferred', 0) / 1024:.1f} KB em {timing.get('resource_count', 0):.0f} recurso(s) (quando informado pelo servidor)")
+            slowest = timing.get("slowest") or []
+            if slowest:
+                lines.append("<b>Recursos mais lentos</b>")
+                lines.append("<table>" + "".join(
+                    f"<tr><td align='right'>{entry.get('duration', 0):.0f} ms</td><td align='right'>{entry.get('size', 0) / 1024:.1f} KB</td>"
+                    f"<td>{html.escape(str(entry.get('type', '')))}</td><td>{html.escape(str(entry.get('name', ''))[:80])}</td></tr>"
+                    for entry in slowest
+                ) + "</table>")
+        else:
+            lines.append("Tempos de carregamento disponíveis após o fim do carregamento.")
+        if summary["blocked_hosts"]:
+            lines.append("<b>Hosts bloqueados</b>")
+            lines.append("<br>".join(f"{html.escape(blocked_host)}: {count}" for blocked_host, count in summary["blocked_hosts"]))
+        self.summary_label.setText("<br>".join(lines))
+
+class ConnectionWarmer(QObject):
+    # Conexões pré-abertas ociosas são fechadas pelo Chromium em poucos segundos; não repete antes disso
+    REWARM_INTERVAL = 10
+    IDLE_DELAY = 3000
+
+    def __init__(self, settings, blocker, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.blocker = blocker
+        # Página oculta (sem view) por perfil, usada só para carregar as dicas de preconnect
+        self.pages = {}
+        self.warmed = {}
+
+    @staticmethod
+    def origin_of(url):
+        parsed = urlparse(url)
+        if parsed.scheme in ("http", "https") and parsed.netloc:
+            return f"{parsed.scheme}://{parsed.netloc.lower()}"
+        return None
+
+    def page_for(self, profile):
+        page = self.pages.get(profile)
+        if page is None:
+            page = QWebEnginePage(profile, self)
+            self.pages[profile] = page
+        return page
+
+    def warm(self, urls, profile, limit=None):
+        if not self.settings.get("warmup_enabled", True):
+            return
+        now = time.monotonic()
+        origins = []
+        for url in urls:
+            origin = self.origin_of(url)
+            if not origin or origin in origins or now - self.warmed.get(origin, -self.REWARM_INTERVAL) < self.REWARM_INTERVAL:
+                continue
+            if self.blocker.find_blocked_domain(urlparse(origin).hostname or ""):
+                continue
+            origins.append(origin)
+            if limit is not None and len(origins) >= limit:
+                break
+        if not origins:
+            return
+        for origin in origins:
+            self.warmed[origin] = now
+        hints = "".join(f'<link rel="dns-prefetch" href="{html.escape(origin)}"><link rel="preconnect" href="{html.escape(origin)}">' for origin in origins)
+        self.page_for(profile).setHtml(f"<html><head>{hints}</head></html>")
+        print(f"Pré-conectando a {len(origins)} origem(ns): {', '.join(origins)}")  # Log de depuração
+
+    def release(self):
+        for page in self.pages.values():
+            page.deleteLater()
+        self.pages.clear()
+
+class WebViewPool(QObject):
+    # Views reservadas por perfil, com o renderizador já iniciado, para que uma nova aba só precise navegar
+    REFILL_DELAY = 1000
+    BLANK_URL = "about:blank"
+
+    def __init__(self, settings, factory, release, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.factory = factory
+        self.release_view = release
+        self.views = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.refill)
+
+    def size(self):
+        return max(0, self.settings.get("view_pool_size", 1))
+
+    def count(self):
+        return sum(len(views) for views in self.views.values())
+
+    def fill(self, profiles):
+        # Descarta as reservas de perfis que deixaram de ser usados (ex.: troca do tipo de cache)
+        for profile in list(self.views):
+            if profile not in profiles:
+                self.discard(profile, 0)
+        for profile in profiles:
+            self.views.setdefault(profile, deque())
+            self.discard(profile, self.size())
+        self.schedule_refill()
+
+    def discard(self, profile, keep):
+        views = self.views.get(profile)
+        while views and len(views) > keep:
+            self.release_view(views.pop())
+        if not keep:
+            self.views.pop(profile, None)
+
+    def schedule_refill(self):
+        if self.size() and not self.timer.isActive():
+            self.timer.start(self.REFILL_DELAY)
+
+    def refill(self):
+        # Uma view por vez, para não disputar o laço de eventos com a aba que acabou de abrir
+        for profile, views in self.views.items():
+            if len(views) < self.size():
+                web_view = self.factory(profile)
+                web_view.setUrl(QUrl(self.BLANK_URL))
+                views.append(web_view)
+                self.schedule_refill()
+                return
+
+    def take(self, profile):
+        views = self.views.setdefault(profile, deque())
+        self.schedule_refill()
+        if not views:
+            return None
+        web_view = views.popleft()
+        web_view.loadFinished.connect(self.drop_blank_entry)
+        return web_view
+
+    def drop_blank_entry(self, ok):
+        # A entrada about:blank do pré-aquecimento não deve aparecer no botão Voltar
+        web_view = self.sender()
+        if not isinstance(web_view, QWebEngineView) or web_view.url().toString() == self.BLANK_URL:
+            return
+        web_view.loadFinished.disconnect(self.drop_blank_entry)
+        history = web_view.history()
+        if history.count() == 2 and history.itemAt(0).url().toString() == self.BLANK_URL:
+            history.clear()
+
+    def release(self):
+        self.timer.stop()
+        for profile in list(self.views):
+            self.discard(profile, 0)
+
+NEW_TAB_PAINT_SCRIPT = """
+(function () {
+    var paint = performance.getEntriesByName("first-contentful-paint")[0];
+    return {origin: performance.timeOrigin, paint: paint ? paint.startTime : null, now: performance.now()};
+})();
+"""
+
+class ProcessSampler(QObject):
+    sampled = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        # pid -> (tempo de CPU em ticks, instante da leitura) da amostra anterior
+        self.previous = {}
+
+    def read_cpu_ticks(self, pid):
+        with open(f"/proc/{pid}/stat") as f:
+            # O nome do processo pode conter espaços; os campos numéricos vêm depois do último ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[11]) + int(fields[12])
 
-    def normalize_domain(self, domain):
-        domain = domain.strip().lower()
-        domain = re.sub(r'^https?://', '', domain)
-        domain = domain.split('/')[0]
-        if not domain or domain.startswith('localhost'):
-            return None
-        if re.match(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', domain):
-            return domain
-        if any(ord(c) > 127 for c in domain):
+    def read_pss(self, pid):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return 0
+
+    def sample(self, pids):
+        now = time.monotonic()
+        samples = {}
+        for pid in pids:
             try:
-                domain = idna.encode(domain).decode('ascii')
-            except idna.IDNAError:
-                return None
-        if re.match(r'^[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]*)*\.[a-z0-9]{1,}$', domain):
-            return domain
-        return None
+                ticks = self.read_cpu_ticks(pid)
+            except (OSError, ValueError, IndexError):
+                continue
+            previous = self.previous.get(pid)
+            cpu = None
+            if previous and now > previous[1]:
+                cpu = (ticks - previous[0]) / self.clock_ticks / (now - previous[1]) * 100
+            self.previous[pid] = (ticks, now)
+            samples[pid] = {"rss": read_process_rss(pid), "pss": self.read_pss(pid), "cpu": cpu}
+        for pid in list(self.previous):
+            if pid not in samples:
+                del self.previous[pid]
+        self.sampled.emit(samples)
+
+class TaskManagerDialog(QDialog):
+    SAMPLE_INTERVAL = 2000
+    sample_requested = pyqtSignal(list)
+
+    def __init__(self, browser, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Gerenciador de Tarefas")
+        self.setMinimumSize(650, 400)
+        self.browser = browser
+        self.samples = {}
+        self.sampler_thread = None
+        self.sampler = None
 
-class DomainBlocker(QWebEngineUrlRequestInterceptor):
-    def __init__(self, blocked_domains, whitelist, settings):
-        super().__init__()
-        self.blocked_domains = blocked_domains
-        self.whitelist = whitelist
-        self.settings = settings
+        layout = QVBoxLayout()
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Processo / Aba", "Memória (RSS)", "Memória (PSS)", "CPU", "Estado"])
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.tree.setColumnWidth(0, 280)
+        self.tree.itemSelectionChanged.connect(self.update_buttons)
+        layout.addWidget(self.tree)
 
-    def interceptRequest(self, info):
-        url = info.requestUrl().toString()
-        domain = urlparse(url).netloc.lower()
-        if self.settings.get("whitelist_enabled", True) and domain in self.whitelist:
+        button_layout = QHBoxLayout()
+        self.freeze_button = QPushButton("Congelar")
+        self.freeze_button.clicked.connect(self.freeze_selected)
+        button_layout.addWidget(self.freeze_button)
+        self.close_tab_button = QPushButton("Fechar Aba")
+        self.close_tab_button.clicked.connect(self.close_selected)
+        button_layout.addWidget(self.close_tab_button)
+        self.close_button = QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.request_sample)
+        self.update_buttons()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.start_sampling()
+
+    def hideEvent(self, event):
+        self.stop_sampling()
+        super().hideEvent(event)
+
+    def start_sampling(self):
+        if self.sampler_thread:
             return
-        for blocked in self.blocked_domains:
-            blocked_domain = urlparse(blocked).netloc.lower() or blocked.lower()
-            if blocked_domain and (blocked_domain == domain or domain.endswith('.' + blocked_domain)):
-                info.block(True)
-                web_view = self.sender().view() if hasattr(self.sender(), 'view') else None
-                if web_view:
-                    web_view.setHtml("""
-                        <html>
-                        <body style='background-color: #f5f5f5; color: #333333; text-align: center; padding: 50px;'>
-                            <h1>Site Bloqueado</h1>
-                            <p>Este site está na lista de bloqueio.</p>
-                        </body>
-                        </html>
-                    """)
-                print(f"Bloqueando URL: {url} (domínio: {blocked_domain})")
-                return
+        # A leitura de /proc roda fora da thread da interface
+        self.sampler_thread = QThread()
+        self.sampler = ProcessSampler()
+        self.sampler.moveToThread(self.sampler_thread)
+        self.sample_requested.connect(self.sampler.sample)
+        self.sampler.sampled.connect(self.update_samples)
+        self.sampler_thread.start()
+        self.refresh_tree()
+        self.request_sample()
+        self.timer.start(self.SAMPLE_INTERVAL)
+
+    def stop_sampling(self):
+        self.timer.stop()
+        if self.sampler_thread:
+            self.sample_requested.disconnect(self.sampler.sample)
+            self.sampler_thread.quit()
+            self.sampler_thread.wait()
+            self.sampler_thread = None
+            self.sampler = None
+
+    def tab_entries(self):
+        entries = []
+        for index in range(self.browser.tabs.count()):
+            widget = self.browser.tabs.widget(index)
+            title = self.browser.tabs.tabText(index)
+            if isinstance(widget, QWebEngineView):
+                page = widget.page()
+                entries.append((widget, title, page.renderProcessPid(), page.lifecycleState().name))
+            else:
+                entries.append((widget, title, 0, "Não carregada"))
+        return entries
+
+    def request_sample(self):
+        pids = sorted({pid for _, _, pid, _ in self.tab_entries() if pid > 0} | {os.getpid()})
+        self.sample_requested.emit(pids)
+
+    def update_samples(self, samples):
+        self.samples = samples
+        self.refresh_tree()
+
+    @staticmethod
+    def format_bytes(value):
+        return f"{value / (1024 * 1024):.1f} MB" if value else "-"
+
+    def process_columns(self, pid):
+        sample = self.samples.get(pid)
+        if not sample:
+            return ["-", "-", "-"]
+        cpu = sample["cpu"]
+        return [self.format_bytes(sample["rss"]), self.format_bytes(sample["pss"]), f"{cpu:.1f}%" if cpu is not None else "-"]
+
+    def refresh_tree(self):
+        selected = {id(item.data(0, Qt.ItemDataRole.UserRole)) for item in self.tree.selectedItems()}
+        groups = {}
+        for entry in self.tab_entries():
+            groups.setdefault(entry[2], []).append(entry)
+        self.tree.clear()
+        browser_item = QTreeWidgetItem(["Navegador (processo principal)"] + self.process_columns(os.getpid()) + [""])
+        self.tree.addTopLevelItem(browser_item)
+        for pid in sorted(groups, key=lambda pid: (pid == 0, pid)):
+            # Abas que compartilham um renderizador ficam agrupadas sob o mesmo processo
+            label = f"Renderizador {pid}" if pid > 0 else "Sem processo"
+            process_item = QTreeWidgetItem([f"{label} ({len(groups[pid])} aba(s))"] + (self.process_columns(pid) if pid > 0 else ["-", "-", "-"]) + [""])
+            process_item.setFlags(process_item.flags() & ~Qt.ItemFlag.ItemIsSelectable)
+            self.tree.addTopLevelItem(process_item)
+            for widget, title, _, state in groups[pid]:
+                tab_item = QTreeWidgetItem([title, "", "", "", state])
+                tab_item.setData(0, Qt.ItemDataRole.UserRole, widget)
+                process_item.addChild(tab_item)
+                if id(widget) in selected:
+                    tab_item.setSelected(True)
+            process_item.setExpanded(True)
+        self.update_buttons()
+
+    def selected_widgets(self):
+        widgets = [item.data(0, Qt.ItemDataRole.UserRole) for item in self.tree.selectedItems()]
+        return [widget for widget in widgets if widget is not None]
+
+    def update_buttons(self):
+        widgets = self.selected_widgets()
+        self.freeze_button.setEnabled(any(isinstance(widget, QWebEngineView) for widget in widgets))
+        self.close_tab_button.setEnabled(bool(widgets))
+
+    def freeze_selected(self):
+        skipped = 0
+        for widget in self.selected_widgets():
+            if not isinstance(widget, QWebEngineView):
+                continue
+            if widget.page().isVisible():
+                # O Qt não permite congelar a aba visível
+                skipped += 1
+                continue
+            self.browser.tab_lifecycle.set_state(widget, QWebEnginePage.LifecycleState.Frozen)
+        if skipped:
+            QMessageBox.information(self, "Gerenciador de Tarefas", "A aba visível não pode ser congelada.")
+        self.refresh_tree()
+
+    def close_selected(self):
+        for widget in self.selected_widgets():
+            index = self.browser.tabs.indexOf(widget)
+            if index >= 0:
+                self.browser.close_tab(index)
+        self.refresh_tree()
 
 class Browser(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_profiler=None, leak_tracker=None):
         super().__init__()
+        self.startup_profiler = startup_profiler or StartupProfiler()
+        self.leak_tracker = leak_tracker or LeakTracker(parent=self)
         self.setWindowTitle("Navegador Avançado")
         self.setGeometry(100, 100, 1200, 800)
 
-        self.history = []
+        self.history_store = HistoryStore("history.db")
+        # As visitas são gravadas no SQLite em lote, fora do caminho de cada navegação
+        self.history_commit_timer = QTimer(self)
+        self.history_commit_timer.setSingleShot(True)
+        self.history_commit_timer.setInterval(2000)
+        self.history_commit_timer.timeout.connect(self.history_store.commit)
+        # Substituído pelo índice completo montado em segundo plano por start_completion_index_build
+        self.completion_index = CompletionIndex()
+        self.completion_pending = None
+        self.completion_thread = None
+        self.persistence = PersistenceService(parent=self)
         self.bookmarks_file = "bookmarks.json"
         self.bookmarks = self.load_bookmarks()
+        self.startup_profiler.mark("favoritos carregados")
         self.settings_file = "settings.json"
         self.settings = self.load_settings()
+        self.startup_profiler.mark("configurações carregadas")
         self.blocked_sites_file = "blocked_sites.json"
         self.blocked_sites = self.load_blocked_sites()
+        self.startup_profiler.mark("sites bloqueados carregados")
         self.blocked_lists_file = "blocked_lists.json"
         self.blocked_lists = self.load_blocked_lists()
+        self.startup_profiler.mark("listas de bloqueio carregadas")
         self.whitelist_file = "whitelist.json"
         self.whitelist = self.load_whitelist()
-
-        self.private_profile = QWebEngineProfile("private_profile", self)
-        self.private_profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.MemoryHttpCache)
-        self.private_profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+        self.startup_profiler.mark("whitelist carregada")
+        self.blocked_sites_store = DomainStore(self.blocked_sites)
+        self.blocked_sites_store.subscribe(lambda added, removed: self.save_blocked_sites())
+        self.whitelist_store = DomainStore(self.whitelist)
+        self.whitelist_store.subscribe(lambda added, removed: self.save_whitelist())
+        self.persistence.register("bookmarks", self.bookmarks_file, lambda: list(self.bookmarks))
+        self.persistence.register("blocked_sites", self.blocked_sites_file, lambda: build_domain_store(list(self.blocked_sites), self.settings))
+        self.persistence.register("blocked_lists", self.blocked_lists_file, lambda: list(self.blocked_lists))
+        self.persistence.register("whitelist", self.whitelist_file, lambda: build_domain_store(list(self.whitelist), self.settings))
+        self.session_file = "session.json"
+        self.persistence.register("session", self.session_file, self.session_snapshot)
+        # Carregado em finish_startup: listas grandes têm dezenas de milhares de regras
+        self.cosmetic_filters_file = "cosmetic_filters.json"
+        self.cosmetic_filters = CosmeticFilterIndex()
+        self.site_settings_file = "site_settings.json"
+        self.site_settings = self.load_site_settings()
+        CustomWebEnginePage.site_settings = self.site_settings
+        self.persistence.register("site_settings", self.site_settings_file, self.site_settings.to_data)
+        self.persistence.register("cosmetic_filters", self.cosmetic_filters_file, lambda: self.cosmetic_filters.to_data())
+        self.restoring_tabs = False
+
+        # Criado em finish_startup (ou na primeira aba anônima), fora do caminho da primeira pintura
+        self.private_profile = None
+        self.private_interceptor = None
+        # Perfil nomeado usado pelas abas normais apenas quando o cache em disco está ativo.
+        # O modo é fixado na inicialização: trocar no meio da sessão dividiria os dados dos sites entre abas
+        self.disk_profile = None
+        self.disk_cache_enabled = self.settings.get("default_cache_type", "Memória") == "Disco"
+        self.deferred_startup_done = False
+        self.first_page_loaded = False
 
         self.setup_ui()
         if self.tabs is None:
             raise RuntimeError("QTabWidget não foi inicializado corretamente em setup_ui")
+        self.tab_lifecycle = TabLifecycleManager(self.tabs, self.settings, self)
+        self.startup_profiler.mark("interface criada")
         self.blocker = DomainBlocker(self.blocked_sites, self.whitelist, self.settings)
-        QWebEngineProfile.defaultProfile().setUrlRequestInterceptor(self.blocker)
-        self.private_profile.setUrlRequestInterceptor(self.blocker)
+        self.network_metrics = NetworkMetrics()
+        self.network_panel = None
+        self.request_recorder = None
+        self.apply_request_log_settings()
+        self.apply_console_settings()
+        self.block_page_handler = BlockPageSchemeHandler(self)
+        self.install_blocker(QWebEngineProfile.defaultProfile())
+        self.apply_cache_settings()
+        self.connection_warmer = ConnectionWarmer(self.settings, self.blocker, self)
+        self.view_pool = WebViewPool(self.settings, self.build_web_view, self.release_web_view, self)
+        self.new_tab_latencies = deque(maxlen=50)
+        self.startup_profiler.mark("interceptador instalado")
         self.setup_menus()
+        self.startup_profiler.mark("menus criados")
         self.setup_signals()
-        self.add_new_tab(QUrl("https://www.google.com"), "Página Inicial")
+        self.startup_profiler.mark("sinais conectados")
+        first_view = self.restore_session()
+        first_view.loadFinished.connect(self.on_first_page_loaded)
+        self.startup_profiler.mark("primeira aba criada")
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        self.startup_profiler.mark("laço de eventos iniciado")
+        self.ensure_private_profile()
+        self.startup_profiler.mark("perfil anônimo criado")
+        self.blocker.rebuild_index()
+        self.startup_profiler.mark(f"índice do bloqueador montado ({len(self.blocker.blocked_index)} domínios)")
+        self.load_cosmetic_filters()
+        self.startup_profiler.mark(f"filtros cosméticos carregados ({self.cosmetic_filters.rule_count()} regras)")
+        self.setup_lists_menu()
+        self.startup_profiler.mark("ações de importação/exportação criadas")
+        self.start_completion_index_build()
+        self.deferred_startup_done = True
+        if self.first_page_loaded:
+            self.startup_profiler.finish()
+
+    def on_first_page_loaded(self, ok):
+        if self.first_page_loaded:
+            return
+        self.first_page_loaded = True
+        self.startup_profiler.mark("primeira página carregada" if ok else "primeira página falhou")
+        QTimer.singleShot(ConnectionWarmer.IDLE_DELAY, self.warm_frequent_origins)
+        QTimer.singleShot(ConnectionWarmer.IDLE_DELAY, self.refill_view_pool)
+        if self.deferred_startup_done:
+            self.startup_profiler.finish()
+
+    def warm_frequent_origins(self):
+        limit = self.settings.get("warmup_origins", 6)
+        if not limit:
+            return
+        urls = [bookmark["url"] for bookmark in self.bookmarks]
+        urls.extend(entry["url"] for entry in self.history_store.most_visited(limit * 2))
+        self.connection_warmer.warm(urls, self.browsing_profile(), limit)
+
+    def warm_action_origin(self):
+        action = self.sender()
+        current_web_view = self.tabs.currentWidget()
+        if action and current_web_view:
+            # Pré-conecta no perfil da aba onde o menu vai abrir a página
+            self.connection_warmer.warm([action.data()], current_web_view.page().profile())
+
+    def start_completion_index_build(self):
+        if self.completion_thread:
+            return
+        self.completion_pending = []
+        self.completion_thread = QThread()
+        self.completion_builder = CompletionIndexBuilder(self.history_store, list(self.bookmarks))
+        self.completion_builder.moveToThread(self.completion_thread)
+        self.completion_builder.finished.connect(self.completion_index_built)
+        self.completion_thread.started.connect(self.completion_builder.run)
+        self.completion_thread.start()
+
+    def completion_index_built(self, index):
+        # Reaplica as visitas e favoritos registrados enquanto o índice era montado
+        pending = self.completion_pending
+        self.completion_index = index
+        self.completion_pending = None
+        for kind, url, title in pending:
+            self.record_completion(kind, url, title)
+        self.completion_thread.quit()
+        self.completion_thread.wait()
+        self.completion_thread = None
+        self.completion_builder = None
+        print(f"Índice de autocompletar montado com {len(index.entries)} endereços")
+
+    def record_completion(self, kind, url, title):
+        if kind == "visit":
+            self.completion_index.add_visit(url, title)
+        elif kind == "bookmark":
+            self.completion_index.add_bookmark(url, title)
+        else:
+            self.completion_index = CompletionIndex.from_entries([], self.bookmarks)
+        if self.completion_pending is not None:
+            self.completion_pending.append((kind, url, title))
+
+    def update_url_completions(self, text):
+        suggestions = self.completion_index.complete(text) if text.strip() else []
+        self.url_completion_model.set_suggestions(suggestions)
+        if suggestions:
+            self.url_completer.complete()
+        else:
+            self.url_completer.popup().hide()
+
+    def ensure_private_profile(self):
+        if self.private_profile is None:
+            self.private_profile = QWebEngineProfile("private_profile", self)
+            self.private_profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+            self.private_interceptor = PrivateRequestInterceptor(self.blocker)
+            self.install_blocker(self.private_profile)
+            self.apply_cache_settings()
+        return self.private_profile
+
+    def install_blocker(self, profile):
+        # A navegação privada nunca entra no registro de requisições
+        profile.setUrlRequestInterceptor(self.private_interceptor if profile is self.private_profile else self.blocker)
+        profile.installUrlSchemeHandler(BLOCK_PAGE_SCHEME, self.block_page_handler)
+        install_page_timing_script(profile)
+        if self.deferred_startup_done:
+            self.refresh_cosmetic_scripts([profile])
+
+    def load_cosmetic_filters(self):
+        try:
+            if os.path.exists(self.cosmetic_filters_file):
+                with open(self.cosmetic_filters_file, "r") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.cosmetic_filters = CosmeticFilterIndex.from_data(data)
+        except (json.JSONDecodeError, IOError, TypeError, AttributeError) as e:
+            print(f"Erro ao carregar filtros cosméticos: {e}")
+        self.refresh_cosmetic_scripts()
+
+    def load_site_settings(self):
+        try:
+            if os.path.exists(self.site_settings_file):
+                with open(self.site_settings_file, "r") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    return SiteSettingsStore(data)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Erro ao carregar configurações por site: {e}")
+        return SiteSettingsStore()
+
+    def site_settings_changed(self):
+        self.persistence.mark_dirty("site_settings")
+        # As abas abertas recebem os novos valores; a atual é recarregada para aplicá-los ao documento
+        current_web_view = self.tabs.currentWidget()
+        for index in range(self.tabs.count()):
+            web_view = self.tabs.widget(index)
+            if isinstance(web_view, QWebEngineView) and web_view.page().apply_site_settings(web_view.url()) and web_view is current_web_view:
+                web_view.reload()
+
+    def open_site_settings(self, host=None):
+        print("Abrindo configurações por site")  # Log de depuração
+        dialog = SiteSettingsDialog(self.site_settings, self.normalize_domain, self.site_settings_changed, host, self)
+        dialog.exec()
+
+    def toggle_site_setting(self, host, name, enabled):
+        values = dict(self.site_settings.rules.get(host, {}))
+        values[name] = enabled
+        self.site_settings.set(host, values)
+        self.site_settings_changed()
+
+    def reset_site_settings(self, host):
+        if self.site_settings.remove(host):
+            self.site_settings_changed()
+
+    def show_web_view_context_menu(self, position):
+        web_view = self.sender()
+        if not isinstance(web_view, QWebEngineView):
+            return
+        menu = web_view.createStandardContextMenu()
+        host = web_view.url().host(QUrl.ComponentFormattingOption.FullyEncoded).lower()
+        if host and web_view.url().scheme() in ("http", "https"):
+            menu.addSeparator()
+            site_menu = menu.addMenu(f"Configurações de {host}")
+            page_settings = web_view.page().settings()
+            for name, (attribute, label) in SITE_SETTING_ATTRIBUTES.items():
+                action = site_menu.addAction(label)
+                action.setCheckable(True)
+                action.setChecked(page_settings.testAttribute(attribute))
+                action.toggled.connect(lambda checked, name=name: self.toggle_site_setting(host, name, checked))
+            site_menu.addSeparator()
+            reset_action = site_menu.addAction("Restaurar Padrões deste Site")
+            reset_action.setEnabled(host in self.site_settings.rules)
+            reset_action.triggered.connect(lambda: self.reset_site_settings(host))
+            site_menu.addAction("Todas as Configurações por Site...").triggered.connect(lambda: self.open_site_settings(host))
+        menu.exec(web_view.mapToGlobal(position))
+        menu.deleteLater()
+
+    def add_cosmetic_rules(self, rules):
+        added = self.cosmetic_filters.add_rules(rules)
+        print(f"Regras cosméticas adicionadas: {added} de {len(rules)}")  # Log de depuração
+        if added:
+            self.persistence.mark_dirty("cosmetic_filters")
+            self.refresh_cosmetic_scripts()
+
+    def refresh_cosmetic_scripts(self, profiles=None):
+        enabled = self.settings.get("cosmetic_filtering", True)
+        CustomWebEnginePage.cosmetic_filters = self.cosmetic_filters if enabled else None
+        css = self.cosmetic_filters.generic_css() if enabled else ""
+        excepted_rules = self.cosmetic_filters.excepted_generic_rules() if enabled else None
+        if profiles is None:
+            profiles = [profile for _, profile in self.cache_profiles()]
+        # A folha genérica vale para todos os quadros, já sem as regras liberadas no site de cada um;
+        # a específica do site é trocada por página na navegação
+        for profile in profiles:
+            replace_style_script(profile.scripts(), COSMETIC_GENERIC_SCRIPT, css, True, excepted_rules)
+
+    def show_blocker_stats(self):
+        stats = self.blocker.stats
+        blocked = stats["blocked_navigations"] + stats["blocked_subresources"]
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        QMessageBox.information(
+            self,
+            "Estatísticas do Bloqueador",
+            f"Requisições verificadas: {stats['requests']}\n"
+            f"Bloqueadas: {blocked} ({blocked * 100 / stats['requests'] if stats['requests'] else 0:.1f}%)\n"
+            f"  Navegações redirecionadas para a página de bloqueio: {stats['blocked_navigations']}\n"
+            f"  Recursos cancelados: {stats['blocked_subresources']}\n"
+            f"Cache de decisões por página: {stats['cache_hits'] * 100 / lookups if lookups else 0:.1f}% de acertos "
+            f"({stats['cache_hits']} de {lookups} consultas, {len(self.blocker.decision_cache)} site(s) em cache)"
+        )
+
+    def browsing_profile(self):
+        # O perfil padrão do Qt 6 é off-the-record e ignora o cache em disco; nesse modo as abas normais usam um perfil nomeado
+        if not self.disk_cache_enabled:
+            return QWebEngineProfile.defaultProfile()
+        if self.disk_profile is None:
+            self.disk_profile = QWebEngineProfile("lukebrowser", self)
+            self.disk_profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+            self.install_blocker(self.disk_profile)
+            self.apply_cache_settings()
+        return self.disk_profile
+
+    def apply_cache_settings(self):
+        default_size = self.settings.get("default_cache_size_mb", 0) * 1024 * 1024
+        default_type = self.settings.get("default_cache_type", "Memória")
+        default_profile = QWebEngineProfile.defaultProfile()
+        default_profile.setHttpCacheType(CACHE_TYPES["Sem cache" if default_type == "Sem cache" else "Memória"])
+        default_profile.setHttpCacheMaximumSize(default_size)
+        if self.disk_profile is not None:
+            cache_path = self.settings.get("default_cache_path", "")
+            if cache_path:
+                self.disk_profile.setCachePath(cache_path)
+            self.disk_profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+            self.disk_profile.setHttpCacheMaximumSize(default_size)
+        if self.private_profile is not None:
+            private_type = self.settings.get("private_cache_type", "Memória")
+            self.private_profile.setHttpCacheType(CACHE_TYPES["Sem cache" if private_type == "Sem cache" else "Memória"])
+            self.private_profile.setHttpCacheMaximumSize(self.settings.get("private_cache_size_mb", 64) * 1024 * 1024)
+        for _, profile in self.cache_profiles():
+            profile.settings().setAttribute(QWebEngineSettings.WebAttribute.DnsPrefetchEnabled, self.settings.get("warmup_enabled", True))
+
+    def cache_profiles(self):
+        profiles = [("Perfil Padrão", QWebEngineProfile.defaultProfile())]
+        if self.disk_profile is not None:
+            profiles.append(("Perfil Padrão (cache em disco)", self.disk_profile))
+        if self.private_profile is not None:
+            profiles.append(("Perfil Anônimo", self.private_profile))
+        return profiles
+
+    def clear_cache(self, kind):
+        if kind == "private":
+            profiles = [self.private_profile] if self.private_profile is not None else []
+        else:
+            profiles = [profile for profile in (QWebEngineProfile.defaultProfile(), self.disk_profile) if profile is not None]
+        for profile in profiles:
+            profile.clearHttpCache()
+        print(f"Cache limpo: {kind} ({len(profiles)} perfil(is))")  # Log de depuração
+        QMessageBox.information(self, "Cache", "Limpeza do cache iniciada.")
+
+    def show_cache_stats(self):
+        print("Abrindo estatísticas do cache")  # Log de depuração
+        dialog = CacheStatsDialog(self.cache_profiles(), self)
+        dialog.exec()
 
     def setup_ui(self):
         self.tabs = QTabWidget()
@@ -765,6 +4051,10 @@ class Browser(QMainWindow):
 
         self.url_bar = QLineEdit()
         self.url_bar.setPlaceholderText("Digite a URL e pressione Enter")
+        self.url_completion_model = UrlCompletionModel(self)
+        self.url_completer = QCompleter(self.url_completion_model, self)
+        self.url_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.url_bar.setCompleter(self.url_completer)
 
         self.back_button = QPushButton(self.style().standardIcon(self.style().StandardPixmap.SP_ArrowBack), "")
         self.back_button.setToolTip("Voltar para página anterior")
@@ -826,26 +4116,8 @@ class Browser(QMainWindow):
         self.private_tab_action.setShortcut("Ctrl+Shift+N")
         self.file_menu.addAction(self.private_tab_action)
 
-        # Sub-menu para Gerenciar Listas
+        # Sub-menu para Gerenciar Listas; as ações são criadas em setup_lists_menu, após a janela ser exibida
         self.lists_menu = self.file_menu.addMenu("Gerenciar Listas")
-        
-        self.export_blocked_sites_action = QAction("Exportar Lista de Sites Bloqueados", self)
-        self.lists_menu.addAction(self.export_blocked_sites_action)
-        
-        self.import_blocked_sites_action = QAction("Importar Lista de Sites Bloqueados", self)
-        self.lists_menu.addAction(self.import_blocked_sites_action)
-        
-        self.export_blocked_lists_action = QAction("Exportar Listas de Bloqueio", self)
-        self.lists_menu.addAction(self.export_blocked_lists_action)
-        
-        self.import_blocked_lists_action = QAction("Importar Listas de Bloqueio", self)
-        self.lists_menu.addAction(self.import_blocked_lists_action)
-        
-        self.export_whitelist_action = QAction("Exportar Whitelist", self)
-        self.lists_menu.addAction(self.export_whitelist_action)
-        
-        self.import_whitelist_action = QAction("Importar Whitelist", self)
-        self.lists_menu.addAction(self.import_whitelist_action)
 
         self.exit_action = QAction("Sair", self)
         self.exit_action.setShortcut("Ctrl+Q")
@@ -853,6 +4125,12 @@ class Browser(QMainWindow):
 
         self.tools_menu = self.menu_bar.addMenu("Ferramentas")
         self.tools_history_menu = self.tools_menu.addMenu("Histórico")
+        self.update_history_menu()
+        # Consultados só ao abrir o menu
+        self.site_history_menu = self.tools_menu.addMenu("Histórico deste Site")
+        self.site_history_menu.aboutToShow.connect(self.update_site_history_menu)
+        self.today_history_menu = self.tools_menu.addMenu("Histórico de Hoje")
+        self.today_history_menu.aboutToShow.connect(self.update_today_history_menu)
 
         self.block_site_action = QAction("Bloquear Site", self)
         self.tools_menu.addAction(self.block_site_action)
@@ -869,15 +4147,63 @@ class Browser(QMainWindow):
         self.limpar_historico_action = QAction("Limpar Histórico", self)
         self.tools_menu.addAction(self.limpar_historico_action)
 
+        self.cache_stats_action = QAction("Estatísticas do Cache", self)
+        self.tools_menu.addAction(self.cache_stats_action)
+
+        self.blocker_stats_action = QAction("Estatísticas do Bloqueador", self)
+        self.tools_menu.addAction(self.blocker_stats_action)
+
+        self.task_manager_action = QAction("Gerenciador de Tarefas", self)
+        self.task_manager_action.setShortcut("Shift+Esc")
+        self.tools_menu.addAction(self.task_manager_action)
+
+        self.console_viewer_action = QAction("Console JavaScript", self)
+        self.tools_menu.addAction(self.console_viewer_action)
+
+        self.network_panel_action = QAction("Painel de Rede e Desempenho", self)
+        self.network_panel_action.setCheckable(True)
+        self.tools_menu.addAction(self.network_panel_action)
+
         self.bookmarks_menu = self.menu_bar.addMenu("Favoritos")
         self.update_bookmarks_menu()
 
+    def setup_lists_menu(self):
+        self.export_blocked_sites_action = QAction("Exportar Lista de Sites Bloqueados", self)
+        self.lists_menu.addAction(self.export_blocked_sites_action)
+        
+        self.import_blocked_sites_action = QAction("Importar Lista de Sites Bloqueados", self)
+        self.lists_menu.addAction(self.import_blocked_sites_action)
+        
+        self.export_blocked_lists_action = QAction("Exportar Listas de Bloqueio", self)
+        self.lists_menu.addAction(self.export_blocked_lists_action)
+        
+        self.import_blocked_lists_action = QAction("Importar Listas de Bloqueio", self)
+        self.lists_menu.addAction(self.import_blocked_lists_action)
+        
+        self.export_whitelist_action = QAction("Exportar Whitelist", self)
+        self.lists_menu.addAction(self.export_whitelist_action)
+        
+        self.import_whitelist_action = QAction("Importar Whitelist", self)
+        self.lists_menu.addAction(self.import_whitelist_action)
+
+        self.repair_stores_action = QAction("Reparar Listas (Revalidar Domínios)", self)
+        self.lists_menu.addAction(self.repair_stores_action)
+
+        self.export_blocked_sites_action.triggered.connect(self.export_blocked_sites)
+        self.import_blocked_sites_action.triggered.connect(self.import_blocked_sites)
+        self.export_blocked_lists_action.triggered.connect(self.export_blocked_lists)
+        self.import_blocked_lists_action.triggered.connect(self.import_blocked_lists)
+        self.export_whitelist_action.triggered.connect(self.export_whitelist)
+        self.import_whitelist_action.triggered.connect(self.import_whitelist)
+        self.repair_stores_action.triggered.connect(self.repair_stores)
+
     def setup_signals(self):
         if self.tabs is None:
             raise RuntimeError("QTabWidget não está inicializado em setup_signals")
         self.tabs.tabCloseRequested.connect(self.close_tab)
         self.tabs.currentChanged.connect(self.update_url_bar_on_tab_change)
         self.url_bar.returnPressed.connect(self.navigate_to_url)
+        self.url_bar.textEdited.connect(self.update_url_completions)
         self.back_button.clicked.connect(self.back)
         self.forward_button.clicked.connect(self.forward)
         self.reload_button.clicked.connect(self.reload)
@@ -889,16 +4215,15 @@ class Browser(QMainWindow):
         self.private_tab_action.triggered.connect(self.add_new_private_tab)
         self.exit_action.triggered.connect(self.close)
         self.limpar_historico_action.triggered.connect(self.limpar_historico)
+        self.cache_stats_action.triggered.connect(self.show_cache_stats)
+        self.blocker_stats_action.triggered.connect(self.show_blocker_stats)
+        self.network_panel_action.triggered.connect(self.toggle_network_panel)
+        self.task_manager_action.triggered.connect(self.open_task_manager)
+        self.console_viewer_action.triggered.connect(self.open_console_viewer)
         self.block_site_action.triggered.connect(self.block_site)
         self.import_block_lists_action.triggered.connect(self.import_block_lists)
         self.settings_action.triggered.connect(self.open_settings)
         self.manage_blocked_sites_action.triggered.connect(self.manage_blocked_sites)
-        self.export_blocked_sites_action.triggered.connect(self.export_blocked_sites)
-        self.import_blocked_sites_action.triggered.connect(self.import_blocked_sites)
-        self.export_blocked_lists_action.triggered.connect(self.export_blocked_lists)
-        self.import_blocked_lists_action.triggered.connect(self.import_blocked_lists)
-        self.export_whitelist_action.triggered.connect(self.export_whitelist)
-        self.import_whitelist_action.triggered.connect(self.import_whitelist)
         print("Sinais configurados em setup_signals")  # Log de depuração
 
     def load_bookmarks(self):
@@ -917,50 +4242,14 @@ class Browser(QMainWindow):
             return []
 
     def save_bookmarks(self):
-        try:
-            if not os.access(os.path.dirname(self.bookmarks_file) or '.', os.W_OK):
-                print(f"Aviso: Permissões insuficientes para salvar {self.bookmarks_file}")
-                return
-            with open(self.bookmarks_file, "w") as f:
-                json.dump(self.bookmarks, f, indent=4)
-        except IOError as e:
-            print(f"Erro ao salvar favoritos: {e}")
+        self.persistence.mark_dirty("bookmarks")
 
     def load_blocked_sites(self):
-        try:
-            if not os.access(self.blocked_sites_file, os.R_OK | os.W_OK):
-                print(f"Aviso: Permissões insuficientes para acessar {self.blocked_sites_file}")
-                return []
-            if os.path.exists(self.blocked_sites_file):
-                with open(self.blocked_sites_file, "r") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        normalized_urls = []
-                        for url in data:
-                            if isinstance(url, str):
-                                normalized = self.normalize_domain(url)
-                                if normalized:
-                                    normalized_urls.append(normalized)
-                                else:
-                                    print(f"Aviso: URL inválida ignorada no arquivo de sites bloqueados: {url}")
-                            else:
-                                print(f"Aviso: Entrada inválida no arquivo de sites bloqueados: {url}")
-                        return normalized_urls
-            return []
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Erro ao carregar lista de sites bloqueados: {e}")
-            return []
+        return self.load_domain_store(self.blocked_sites_file, "sites bloqueados")
 
     def save_blocked_sites(self):
-        try:
-            if not os.access(os.path.dirname(self.blocked_sites_file) or '.', os.W_OK):
-                print(f"Aviso: Permissões insuficientes para salvar {self.blocked_sites_file}")
-                return
-            with open(self.blocked_sites_file, "w") as f:
-                json.dump(self.blocked_sites, f, indent=4)
-            self.blocker.blocked_domains = self.blocked_sites
-        except IOError as e:
-            print(f"Erro ao salvar lista de sites bloqueados: {e}")
+        self.persistence.mark_dirty("blocked_sites")
+        self.blocker.set_blocked_domains(self.blocked_sites)
 
     def load_blocked_lists(self):
         try:
@@ -978,50 +4267,77 @@ class Browser(QMainWindow):
             return []
 
     def save_blocked_lists(self):
-        try:
-            if not os.access(os.path.dirname(self.blocked_lists_file) or '.', os.W_OK):
-                print(f"Aviso: Permissões insuficientes para salvar {self.blocked_lists_file}")
-                return
-            with open(self.blocked_lists_file, "w") as f:
-                json.dump(self.blocked_lists, f, indent=4)
-        except IOError as e:
-            print(f"Erro ao salvar lista de fontes de bloqueio: {e}")
+        self.persistence.mark_dirty("blocked_lists")
 
     def load_whitelist(self):
+        return self.load_domain_store(self.whitelist_file, "whitelist")
+
+    def load_domain_store(self, file_path, description):
         try:
-            if not os.access(self.whitelist_file, os.R_OK | os.W_OK):
-                print(f"Aviso: Permissões insuficientes para acessar {self.whitelist_file}")
+            if not os.access(file_path, os.R_OK | os.W_OK):
+                print(f"Aviso: Permissões insuficientes para acessar {file_path}")
                 return []
-            if os.path.exists(self.whitelist_file):
-                with open(self.whitelist_file, "r") as f:
+            if os.path.exists(file_path):
+                with open(file_path, "r") as f:
                     data = json.load(f)
-                    if isinstance(data, list):
-                        normalized_urls = []
-                        for url in data:
-                            if isinstance(url, str):
-                                normalized = self.normalize_domain(url)
-                                if normalized:
-                                    normalized_urls.append(normalized)
-                                else:
-                                    print(f"Aviso: URL inválida ignorada no arquivo de whitelist: {url}")
-                            else:
-                                print(f"Aviso: Entrada inválida no arquivo de whitelist: {url}")
-                        return normalized_urls
+                if is_trusted_store(data, self.settings):
+                    return data["domains"]
+                domains = store_domains(data)
+                if domains is not None:
+                    print(f"Revalidando {file_path}: versão de formato ou do normalizador diferente")
+                    normalized_urls = self.revalidate_domains(domains, description)
+                    self.write_domain_store(file_path, normalized_urls)
+                    return normalized_urls
             return []
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Erro ao carregar lista de permissões: {e}")
+            print(f"Erro ao carregar lista de {description}: {e}")
             return []
 
-    def save_whitelist(self):
+    def revalidate_domains(self, domains, description):
+        normalized_urls = []
+        seen = set()
+        for url in domains:
+            if isinstance(url, str):
+                normalized = self.normalize_domain(url)
+                if normalized:
+                    if normalized not in seen:
+                        seen.add(normalized)
+                        normalized_urls.append(normalized)
+                else:
+                    print(f"Aviso: URL inválida ignorada no arquivo de {description}: {url}")
+            else:
+                print(f"Aviso: Entrada inválida no arquivo de {description}: {url}")
+        return normalized_urls
+
+    def write_domain_store(self, file_path, domains):
         try:
-            if not os.access(os.path.dirname(self.whitelist_file) or '.', os.W_OK):
-                print(f"Aviso: Permissões insuficientes para salvar {self.whitelist_file}")
-                return
-            with open(self.whitelist_file, "w") as f:
-                json.dump(self.whitelist, f, indent=4)
-            self.blocker.whitelist = self.whitelist
-        except IOError as e:
-            print(f"Erro ao salvar lista de permissões: {e}")
+            if not os.access(os.path.dirname(file_path) or '.', os.W_OK):
+                print(f"Aviso: Permissões insuficientes para salvar {file_path}")
+                return False
+            write_json_atomic(file_path, build_domain_store(domains, self.settings))
+            return True
+        except (IOError, OSError) as e:
+            print(f"Erro ao salvar {file_path}: {e}")
+            return False
+
+    def save_whitelist(self):
+        self.persistence.mark_dirty("whitelist")
+        self.blocker.set_whitelist(self.whitelist)
+
+    def repair_stores(self):
+        print("Revalidando sites bloqueados e whitelist")  # Log de depuração
+        blocked_before = len(self.blocked_sites)
+        whitelist_before = len(self.whitelist)
+        self.blocked_sites[:] = self.revalidate_domains(self.blocked_sites, "sites bloqueados")
+        self.whitelist[:] = self.revalidate_domains(self.whitelist, "whitelist")
+        self.save_whitelist()
+        self.update_blocked_domains()
+        QMessageBox.information(
+            self,
+            "Reparar Listas",
+            f"{blocked_before - len(self.blocked_sites)} site(s) bloqueado(s) e "
+            f"{whitelist_before - len(self.whitelist)} domínio(s) da whitelist removido(s) na revalidação."
+        )
 
     def load_settings(self):
         default_settings = {
@@ -1034,7 +4350,29 @@ class Browser(QMainWindow):
             "sleep_time": 5,
             "rejected_limit": 5,
             "whitelist_enabled": True,
-            "save_mode": "Incremental"
+            "import_concurrency": 3,
+            "tab_freeze_after": 10,
+            "memory_budget_mb": 2048,
+            "restore_session": True,
+            "default_cache_type": "Memória",
+            "default_cache_path": "",
+            "default_cache_size_mb": 0,
+            "private_cache_type": "Memória",
+            "private_cache_size_mb": 64,
+            "warmup_enabled": True,
+            "warmup_origins": 6,
+            "process_model": "Por instância de site (padrão)",
+            "renderer_process_limit": 0,
+            "disable_gpu_rasterization": False,
+            "disable_gpu": False,
+            "extra_chromium_flags": "",
+            "console_silenced_patterns": list(DEFAULT_CONSOLE_SILENCED),
+            "console_rate_limit": 20,
+            "cosmetic_filtering": True,
+            "view_pool_size": 1,
+            "request_log_enabled": False,
+            "request_log_format": "JSONL",
+            "request_log_max_mb": 10
         }
         try:
             if not os.path.exists(self.settings_file):
@@ -1051,6 +4389,8 @@ class Browser(QMainWindow):
             with open(self.settings_file, "r") as f:
                 data = json.load(f)
                 if isinstance(data, dict):
+                    for key in OBSOLETE_SETTINGS:
+                        data.pop(key, None)
                     return data
                 print(f"Erro: {self.settings_file} contém dados inválidos. Retornando configurações padrão.")
                 return default_settings
@@ -1060,51 +4400,56 @@ class Browser(QMainWindow):
 
     def export_blocked_sites(self):
         print("Exportando lista de sites bloqueados")  # Log de depuração
-        file_name, _ = QFileDialog.getSaveFileName(self, "Exportar Lista de Sites Bloqueados", "", "JSON Files (*.json)")
-        if file_name:
-            try:
-                with open(file_name, "w") as f:
-                    json.dump(self.blocked_sites, f, indent=4)
-                QMessageBox.information(self, "Exportação", "Lista de sites bloqueados exportada com sucesso.")
-            except IOError as e:
-                print(f"Erro ao exportar lista de sites bloqueados: {e}")
-                QMessageBox.warning(self, "Erro", f"Falha ao exportar lista de sites bloqueados: {e}")
+        self.export_domains("Exportar Lista de Sites Bloqueados", self.blocked_sites, "Lista de sites bloqueados exportada", "lista de sites bloqueados")
 
     def import_blocked_sites(self):
         print("Importando lista de sites bloqueados")  # Log de depuração
-        file_name, _ = QFileDialog.getOpenFileName(self, "Importar Lista de Sites Bloqueados", "", "JSON Files (*.json)")
+        self.import_domains("Importar Lista de Sites Bloqueados", self.blocked_sites_store, True, "site(s) importado(s) com sucesso", "lista de sites bloqueados")
+
+    def export_domains(self, title, domains, success_message, description):
+        file_name, selected_filter = QFileDialog.getSaveFileName(self, title, "", DOMAIN_FILE_EXPORT_FILTERS)
         if file_name:
             try:
-                with open(file_name, "r") as f:
-                    data = json.load(f)
-                    if not isinstance(data, list):
-                        raise ValueError("O arquivo deve conter uma lista de domínios.")
-                    normalized_urls = []
-                    rejected_urls = []
-                    for url in data:
-                        if isinstance(url, str):
-                            normalized = self.normalize_domain(url)
-                            if normalized and normalized not in normalized_urls:
-                                if self.settings.get("whitelist_enabled", True) and normalized in self.whitelist:
-                                    rejected_urls.append(url)
-                                    print(f"Aviso: Domínio na whitelist rejeitado: {url}")
-                                    continue
-                                normalized_urls.append(normalized)
-                            else:
-                                rejected_urls.append(url)
-                                print(f"Aviso: URL inválida ou duplicada ignorada: {url}")
-                        else:
-                            rejected_urls.append(url)
-                            print(f"Aviso: Entrada inválida ignorada: {url}")
-                    self.blocked_sites.extend(normalized_urls)
-                    self.save_blocked_sites()
-                    self.update_blocked_domains()
-                    QMessageBox.information(self, "Importação", f"{len(normalized_urls)} site(s) importado(s) com sucesso.")
-                    if rejected_urls:
-                        QMessageBox.warning(self, "Aviso", f"{len(rejected_urls)} domínio(s) rejeitado(s): {', '.join(rejected_urls[:5])}{'...' if len(rejected_urls) > 5 else ''}")
-            except (json.JSONDecodeError, IOError, ValueError) as e:
-                print(f"Erro ao importar lista de sites bloqueados: {e}")
-                QMessageBox.warning(self, "Erro", f"Falha ao importar lista de sites bloqueados: {e}")
+                file_format = domain_file_format(file_name, selected_filter)
+                file_name = with_format_extension(file_name, file_format)
+                count = write_domain_file(file_name, domains, file_format, self.settings)
+                QMessageBox.information(self, "Exportação", f"{success_message} com sucesso ({count} domínio(s)).")
+            except (IOError, OSError) as e:
+                print(f"Erro ao exportar {description}: {e}")
+                QMessageBox.warning(self, "Erro", f"Falha ao exportar {description}: {e}")
+
+    def import_domains(self, title, store, reject_whitelisted, success_message, description):
+        file_name, selected_filter = QFileDialog.getOpenFileName(self, title, "", DOMAIN_FILE_IMPORT_FILTERS)
+        if not file_name:
+            return
+        rejected_count = 0
+        rejected_sample = []
+        whitelist = set(self.whitelist) if reject_whitelisted and self.settings.get("whitelist_enabled", True) else set()
+        # Domínios já presentes não são guardados no lote: só o que de fato será acrescentado à lista fica em memória
+        known = set(store.items)
+        try:
+            with store.batch() as batch:
+                for url, trusted in read_domain_file(file_name, domain_file_format(file_name, selected_filter), self.settings):
+                    normalized = url if trusted else (self.normalize_domain(url) if isinstance(url, str) else None)
+                    if normalized and normalized not in whitelist:
+                        if normalized not in known:
+                            known.add(normalized)
+                            batch.add(normalized)
+                        continue
+                    rejected_count += 1
+                    if len(rejected_sample) < 5:
+                        rejected_sample.append(str(url))
+                    if normalized:
+                        print(f"Aviso: Domínio na whitelist rejeitado: {url}")
+                    else:
+                        print(f"Aviso: Entrada inválida ignorada: {url}")
+            added, _ = batch.result
+            QMessageBox.information(self, "Importação", f"{len(added)} {success_message}.")
+            if rejected_count:
+                QMessageBox.warning(self, "Aviso", f"{rejected_count} domínio(s) rejeitado(s): {', '.join(rejected_sample)}{'...' if rejected_count > len(rejected_sample) else ''}")
+        except (json.JSONDecodeError, IOError, OSError, ValueError, struct.error, EOFError) as e:
+            print(f"Erro ao importar {description}: {e}")
+            QMessageBox.warning(self, "Erro", f"Falha ao importar {description}: {e}")
 
     def export_blocked_lists(self):
         print("Exportando listas de bloqueio")  # Log de depuração
@@ -1151,54 +4496,35 @@ class Browser(QMainWindow):
 
     def export_whitelist(self):
         print("Exportando whitelist")  # Log de depuração
-        file_name, _ = QFileDialog.getSaveFileName(self, "Exportar Whitelist", "", "JSON Files (*.json)")
-        if file_name:
-            try:
-                with open(file_name, "w") as f:
-                    json.dump(self.whitelist, f, indent=4)
-                QMessageBox.information(self, "Exportação", "Whitelist exportada com sucesso.")
-            except IOError as e:
-                print(f"Erro ao exportar whitelist: {e}")
-                QMessageBox.warning(self, "Erro", f"Falha ao exportar whitelist: {e}")
+        self.export_domains("Exportar Whitelist", self.whitelist, "Whitelist exportada", "whitelist")
 
     def import_whitelist(self):
         print("Importando whitelist")  # Log de depuração
-        file_name, _ = QFileDialog.getOpenFileName(self, "Importar Whitelist", "", "JSON Files (*.json)")
-        if file_name:
-            try:
-                with open(file_name, "r") as f:
-                    data = json.load(f)
-                    if not isinstance(data, list):
-                        raise ValueError("O arquivo deve conter uma lista de domínios.")
-                    normalized_urls = []
-                    rejected_urls = []
-                    for url in data:
-                        if isinstance(url, str):
-                            normalized = self.normalize_domain(url)
-                            if normalized and normalized not in normalized_urls and normalized not in self.whitelist:
-                                normalized_urls.append(normalized)
-                            else:
-                                rejected_urls.append(url)
-                                print(f"Aviso: URL inválida ou duplicada ignorada: {url}")
-                        else:
-                            rejected_urls.append(url)
-                            print(f"Aviso: Entrada inválida ignorada: {url}")
-                    self.whitelist.extend(normalized_urls)
-                    self.save_whitelist()
-                    self.update_blocked_domains()
-                    QMessageBox.information(self, "Importação", f"{len(normalized_urls)} site(s) importado(s) para a whitelist.")
-                    if rejected_urls:
-                        QMessageBox.warning(self, "Aviso", f"{len(rejected_urls)} domínio(s) rejeitado(s): {', '.join(rejected_urls[:5])}{'...' if len(rejected_urls) > 5 else ''}")
-            except (json.JSONDecodeError, IOError, ValueError) as e:
-                print(f"Erro ao importar whitelist: {e}")
-                QMessageBox.warning(self, "Erro", f"Falha ao importar whitelist: {e}")
+        self.import_domains("Importar Whitelist", self.whitelist_store, False, "site(s) importado(s) para a whitelist", "whitelist")
 
     def open_settings(self):
         print("Abrindo diálogo de configurações")  # Log de depuração
-        dialog = SettingsDialog(self.settings_file, self)
+        dialog = SettingsDialog(self.settings_file, self, self.clear_cache, self.open_site_settings)
         dialog.exec()
+        previous_cache_type = self.settings.get("default_cache_type", "Memória")
         self.settings = self.load_settings()
-        self.blocker.settings = self.settings
+        if (previous_cache_type == "Disco") != (self.settings.get("default_cache_type", "Memória") == "Disco"):
+            QMessageBox.information(
+                self,
+                "Cache",
+                "A troca entre cache em disco e em memória usa outro perfil, com dados de sites (armazenamento local, permissões) separados. "
+                "Ela passa a valer para todas as abas após reiniciar o navegador; até lá, as abas continuam no perfil atual."
+            )
+        self.blocker.set_settings(self.settings)
+        self.tab_lifecycle.settings = self.settings
+        self.connection_warmer.settings = self.settings
+        self.view_pool.settings = self.settings
+        self.apply_request_log_settings()
+        self.apply_console_settings()
+        self.apply_cache_settings()
+        self.refresh_cosmetic_scripts()
+        if self.first_page_loaded:
+            self.refill_view_pool()
 
     def normalize_domain(self, domain):
         domain = domain.strip().lower()
@@ -1225,7 +4551,7 @@ class Browser(QMainWindow):
 
     def import_block_lists(self):
         print("Abrindo diálogo de importação de listas de bloqueio")  # Log de depuração
-        dialog = ImportBlockListsDialog(self.update_blocked_domains, self.blocked_sites, self.blocked_lists, self.blocked_sites_file, self.whitelist, self.settings, self)
+        dialog = ImportBlockListsDialog(self.save_blocked_lists, self.blocked_sites_store, self.blocked_lists, self.whitelist, self.settings, self, self.add_cosmetic_rules)
         dialog.exec()
 
     def block_site(self):
@@ -1242,27 +4568,27 @@ class Browser(QMainWindow):
             if self.settings.get("whitelist_enabled", True) and normalized in self.whitelist:
                 QMessageBox.warning(self, "Whitelist", f"O domínio {normalized} está na whitelist e não pode ser bloqueado.")
                 return
-            if normalized not in self.blocked_sites:
-                self.blocked_sites.append(normalized)
-                self.save_blocked_sites()
+            added, _ = self.blocked_sites_store.apply(add=[normalized])
+            if added:
                 QMessageBox.information(self, "Site Bloqueado", f"O site {url} foi adicionado à lista de bloqueio.")
             else:
                 QMessageBox.information(self, "Site Já Bloqueado", f"O site {url} já está na lista de bloqueio.")
 
     def add_to_whitelist(self, domain):
         print(f"Adicionando {domain} à whitelist")  # Log de depuração
-        if domain not in self.whitelist:
-            self.whitelist.append(domain)
-            self.save_whitelist()
-            if domain in self.blocked_sites:
-                self.blocked_sites.remove(domain)
-                self.save_blocked_sites()
-
-    def remove_from_whitelist(self, domain):
-        print(f"Removendo {domain} da whitelist")  # Log de depuração
-        if domain in self.whitelist:
-            self.whitelist.remove(domain)
-            self.save_whitelist()
+        self.move_to_whitelist([domain])
+
+    def move_to_whitelist(self, domains):
+        print(f"Movendo {len(domains)} domínio(s) para a whitelist")  # Log de depuração
+        # Um lote por lista: cada uma notifica (e é persistida) uma única vez
+        with self.whitelist_store.batch() as whitelist_batch, self.blocked_sites_store.batch() as blocked_batch:
+            for domain in domains:
+                whitelist_batch.add(domain)
+                blocked_batch.remove(domain)
+
+    def remove_from_whitelist(self, domains):
+        print(f"Removendo {len(domains)} domínio(s) da whitelist")  # Log de depuração
+        self.whitelist_store.apply(remove=domains)
 
     def manage_blocked_sites(self):
         print("Iniciando manage_blocked_sites")  # Log de depuração
@@ -1271,10 +4597,11 @@ class Browser(QMainWindow):
                 self.blocked_sites,
                 self.blocked_lists,
                 self.whitelist,
-                self.remove_blocked_site,
+                self.remove_blocked_sites,
                 self.remove_blocked_list,
                 self.add_to_whitelist,
                 self.remove_from_whitelist,
+                self.move_to_whitelist,
                 self
             )
             dialog.exec()
@@ -1283,12 +4610,9 @@ class Browser(QMainWindow):
             print(f"Erro ao abrir ManageBlockedSitesDialog: {e}")
             QMessageBox.warning(self, "Erro", f"Falha ao abrir Gerenciar Sites Bloqueados: {e}")
 
-    def remove_blocked_site(self, url):
-        print(f"Removendo site bloqueado: {url}")  # Log de depuração
-        if url in self.blocked_sites:
-            self.blocked_sites.remove(url)
-            self.save_blocked_sites()
-            QMessageBox.information(self, "Site Removido", f"O site {url} foi removido da lista de bloqueio.")
+    def remove_blocked_sites(self, urls):
+        print(f"Removendo {len(urls)} site(s) bloqueado(s)")  # Log de depuração
+        self.blocked_sites_store.apply(remove=urls)
 
     def remove_blocked_list(self, url):
         print(f"Removendo lista bloqueada: {url}")  # Log de depuração
@@ -1300,8 +4624,7 @@ class Browser(QMainWindow):
 
     def update_blocked_domains(self):
         print("Atualizando domínios bloqueados")  # Log de depuração
-        self.blocker.blocked_domains = self.blocked_sites
-        self.blocker.whitelist = self.whitelist
+        self.blocker.set_whitelist(self.whitelist)
         self.save_blocked_sites()
         self.save_blocked_lists()
 
@@ -1322,6 +4645,7 @@ class Browser(QMainWindow):
                 action = QAction(bookmark["title"], self)
                 action.setData(bookmark["url"])
                 action.triggered.connect(self.navigate_to_bookmark)
+                action.hovered.connect(self.warm_action_origin)
                 self.bookmarks_menu.addAction(action)
 
     def add_to_bookmarks(self):
@@ -1333,6 +4657,7 @@ class Browser(QMainWindow):
             if url and url not in [b["url"] for b in self.bookmarks]:
                 self.bookmarks.append({"title": title, "url": url})
                 self.save_bookmarks()
+                self.record_completion("bookmark", url, title)
                 self.update_bookmarks_menu()
                 QMessageBox.information(self, "Favorito Adicionado", f"{title} foi adicionado aos favoritos.")
 
@@ -1344,52 +4669,258 @@ class Browser(QMainWindow):
             if current_web_view:
                 current_web_view.setUrl(QUrl(url))
 
-    def add_new_tab(self, qurl=None, label="Nova Aba"):
-        if qurl is None or not isinstance(qurl, QUrl) or not qurl.isValid():
-            qurl = QUrl("https://www.google.com")
+    def build_web_view(self, profile):
         web_view = QWebEngineView()
-        page = CustomWebEnginePage(parent=web_view)
+        page = CustomWebEnginePage(profile, parent=web_view)
         web_view.setPage(page)
-        web_view.setUrl(qurl)
+        page.setUrlRequestInterceptor(PageRequestMeter(self.blocker, self.network_metrics, page))
+        self.leak_tracker.watch(web_view, page)
+        return web_view
+
+    def create_web_view(self, profile=None, label="Nova Aba", web_view=None):
+        private = profile is not None
+        if web_view is None:
+            web_view = self.build_web_view(profile or self.browsing_profile())
+        web_view.page().main_frame_navigation.connect(self.blocker.page_navigated)
+        web_view.page().main_frame_navigation.connect(self.network_page_navigated)
+        web_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        web_view.customContextMenuRequested.connect(self.show_web_view_context_menu)
         web_view.urlChanged.connect(self.update_url_bar)
         web_view.loadProgress.connect(self.update_progress_bar)
         web_view.loadFinished.connect(self.hide_progress_bar)
-        web_view.titleChanged.connect(lambda title: self.tabs.setTabText(self.tabs.indexOf(web_view), title or "Nova Aba"))
-        web_view.urlChanged.connect(self.add_to_history)
+        web_view.loadFinished.connect(self.collect_page_timing)
+        web_view.titleChanged.connect(lambda title: self.tabs.setTabText(self.tabs.indexOf(web_view), title or label))
+        if not private:
+            web_view.loadFinished.connect(self.add_to_history)
+            web_view.urlChanged.connect(self.mark_session_dirty)
+            web_view.titleChanged.connect(self.mark_session_dirty)
+        self.tab_lifecycle.track(web_view)
+        return web_view
+
+    def add_new_tab(self, qurl=None, label="Nova Aba"):
+        started = time.time()
+        if qurl is None or not isinstance(qurl, QUrl) or not qurl.isValid():
+            qurl = QUrl("https://www.google.com")
+        pooled = self.view_pool.take(self.browsing_profile())
+        web_view = self.create_web_view(label="Nova Aba", web_view=pooled)
+        web_view.setUrl(qurl)
         index = self.tabs.addTab(web_view, label)
         self.tabs.setCurrentIndex(index)
+        self.measure_new_tab(web_view, started, pooled is not None)
         return web_view
 
     def add_new_private_tab(self):
-        web_view = QWebEngineView()
-        page = CustomWebEnginePage(self.private_profile, parent=web_view)
-        web_view.setPage(page)
+        started = time.time()
+        profile = self.ensure_private_profile()
+        pooled = self.view_pool.take(profile)
+        web_view = self.create_web_view(profile, "Nova Aba Anônima", pooled)
         web_view.setUrl(QUrl("https://www.google.com"))
-        web_view.urlChanged.connect(self.update_url_bar)
-        web_view.loadProgress.connect(self.update_progress_bar)
-        web_view.loadFinished.connect(self.hide_progress_bar)
-        web_view.titleChanged.connect(lambda title: self.tabs.setTabText(self.tabs.indexOf(web_view), title or "Nova Aba Anônima"))
         index = self.tabs.addTab(web_view, "Nova Aba Anônima")
         self.tabs.setCurrentIndex(index)
+        self.measure_new_tab(web_view, started, pooled is not None)
+        return web_view
+
+    def refill_view_pool(self):
+        profiles = [self.browsing_profile()]
+        if self.private_profile is not None:
+            profiles.append(self.private_profile)
+        self.view_pool.fill(profiles)
+
+    def measure_new_tab(self, web_view, started, pooled):
+        # Do atalho até a primeira pintura com conteúdo (ou até o fim do carregamento, se o Chromium não a registrou)
+        def on_load_finished(ok):
+            if web_view.url().toString() == WebViewPool.BLANK_URL:
+                return
+            web_view.loadFinished.disconnect(on_load_finished)
+            if ok:
+                web_view.page().runJavaScript(NEW_TAB_PAINT_SCRIPT, QWebEngineScript.ScriptWorldId.ApplicationWorld, report)
+
+        def report(result):
+            if not isinstance(result, dict) or not result.get("origin"):
+                return
+            painted = result["paint"] if result.get("paint") is not None else result.get("now", 0)
+            latency = result["origin"] + painted - started * 1000
+            self.new_tab_latencies.append(latency)
+            median = sorted(self.new_tab_latencies)[len(self.new_tab_latencies) // 2]
+            print(f"Nova aba: {latency:.0f} ms até a primeira pintura ({'view do pool' if pooled else 'view nova'}; mediana das últimas {len(self.new_tab_latencies)}: {median:.0f} ms)")  # Log de depuração
+
+        web_view.loadFinished.connect(on_load_finished)
+
+    def collect_page_timing(self, ok):
+        # O resumo já foi medido pelo script injetado; só é lido para a aba exibida no painel aberto
+        web_view = self.sender()
+        if not ok or web_view is not self.tabs.currentWidget() or self.network_panel is None or not self.network_panel.isVisible():
+            return
+        self.read_page_timing(web_view.page())
+
+    def read_page_timing(self, page):
+        page.runJavaScript(
+            PAGE_TIMING_READ_SCRIPT,
+            QWebEngineScript.ScriptWorldId.ApplicationWorld,
+            lambda result: self.network_metrics.record_timing(page, result)
+        )
+
+    def current_page_host(self):
+        current_web_view = self.tabs.currentWidget()
+        if isinstance(current_web_view, QWebEngineView):
+            return current_web_view.page(), current_web_view.url().host(QUrl.ComponentFormattingOption.FullyEncoded).lower()
+        return None, None
+
+    def network_page_navigated(self, previous_url, url):
+        # Um novo carregamento começa do zero
+        self.network_metrics.reset(self.sender())
+
+    def apply_request_log_settings(self):
+        enabled = self.settings.get("request_log_enabled", False)
+        log_format = self.settings.get("request_log_format", "JSONL")
+        max_bytes = self.settings.get("request_log_max_mb", 10) * 1024 * 1024
+        recorder = self.request_recorder
+        if recorder is not None and enabled and (recorder.log_format, recorder.max_bytes) == (log_format, max_bytes):
+            return
+        # Desativado ou com outro formato/tamanho: encerra o registro atual antes de abrir outro
+        self.blocker.recorder = None
+        if recorder is not None:
+            recorder.stop()
+            recorder.deleteLater()
+            self.request_recorder = None
+        if enabled:
+            self.request_recorder = RequestRecorder("request_logs", log_format, max_bytes, self)
+            self.blocker.recorder = self.request_recorder
+
+    def apply_console_settings(self):
+        patterns = self.settings.get("console_silenced_patterns", DEFAULT_CONSOLE_SILENCED)
+        if not isinstance(patterns, list):
+            patterns = DEFAULT_CONSOLE_SILENCED
+        CustomWebEnginePage.console_filter.configure([pattern for pattern in patterns if isinstance(pattern, str)], self.settings.get("console_rate_limit", 20))
+
+    def open_console_viewer(self):
+        print("Abrindo console JavaScript")  # Log de depuração
+        dialog = ConsoleViewerDialog(CustomWebEnginePage.console_filter, self)
+        dialog.exec()
+
+    def open_task_manager(self):
+        print("Abrindo gerenciador de tarefas")  # Log de depuração
+        dialog = TaskManagerDialog(self, self)
+        dialog.exec()
+
+    def toggle_network_panel(self, checked):
+        if self.network_panel is None:
+            self.network_panel = NetworkPanel(self.network_metrics, self.current_page_host, self.read_page_timing, self)
+            self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.network_panel)
+            self.network_panel.visibilityChanged.connect(self.network_panel_action.setChecked)
+        self.network_panel.setVisible(checked)
+
+    def view_count(self):
+        # Inclui as views reservadas no pool, que também são acompanhadas pelo LeakTracker
+        return self.view_pool.count() + sum(1 for index in range(self.tabs.count()) if not isinstance(self.tabs.widget(index), TabPlaceholder))
+
+    def mark_session_dirty(self, *args):
+        self.persistence.mark_dirty("session")
+
+    def session_snapshot(self):
+        # Abas anônimas não são gravadas; abas ainda não abertas reaproveitam os dados restaurados
+        tabs = []
+        current = 0
+        for index in range(self.tabs.count()):
+            widget = self.tabs.widget(index)
+            if isinstance(widget, TabPlaceholder):
+                entry = {"url": widget.url, "title": widget.title, "history": widget.history_data}
+            elif widget.page().profile() == self.private_profile or widget.url().scheme() == BLOCK_PAGE_SCHEME.decode():
+                # Abas na página de bloqueio também ficam de fora
+                continue
+            else:
+                entry = {"url": widget.url().toString(), "title": widget.title(), "history": serialize_web_history(widget.history())}
+            if index == self.tabs.currentIndex():
+                current = len(tabs)
+            tabs.append(entry)
+        return {"current": current, "tabs": tabs}
+
+    def load_session(self):
+        if not os.path.exists(self.session_file):
+            return {}
+        try:
+            with open(self.session_file, "r") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Erro ao carregar sessão de {self.session_file}: {e}")
+            return {}
+
+    def restore_session(self):
+        session = self.load_session() if self.settings.get("restore_session", True) else {}
+        entries = [entry for entry in session.get("tabs", []) if isinstance(entry, dict) and isinstance(entry.get("url"), str) and entry["url"]]
+        if not entries:
+            return self.add_new_tab(QUrl("https://www.google.com"), "Página Inicial")
+        current = session.get("current", 0)
+        if not isinstance(current, int) or not 0 <= current < len(entries):
+            current = 0
+        # Só a aba ativa é carregada; as demais viram marcadores até serem ativadas
+        self.restoring_tabs = True
+        for position, entry in enumerate(entries):
+            title = entry.get("title") or entry["url"]
+            history_data = entry.get("history") if isinstance(entry.get("history"), str) else None
+            if position == current:
+                widget = self.create_web_view(label=title)
+                if not restore_web_history(widget.history(), history_data):
+                    widget.setUrl(QUrl(entry["url"]))
+                active_view = widget
+            else:
+                widget = TabPlaceholder(entry["url"], title, history_data)
+            index = self.tabs.addTab(widget, title)
+            self.tabs.setTabToolTip(index, entry["url"])
+        self.tabs.setCurrentIndex(current)
+        self.restoring_tabs = False
+        self.update_url_bar_on_tab_change(current)
+        print(f"Sessão restaurada: {len(entries)} aba(s), apenas a ativa carregada")  # Log de depuração
+        return active_view
+
+    def materialize_tab(self, index):
+        placeholder = self.tabs.widget(index)
+        web_view = self.create_web_view(label=placeholder.title)
+        if not restore_web_history(web_view.history(), placeholder.history_data):
+            web_view.setUrl(QUrl(placeholder.url))
+        self.restoring_tabs = True
+        self.tabs.insertTab(index, web_view, placeholder.title)
+        self.tabs.setTabToolTip(index, placeholder.url)
+        self.tabs.removeTab(index + 1)
+        self.tabs.setCurrentIndex(index)
+        self.restoring_tabs = False
+        placeholder.deleteLater()
+        print(f"Aba restaurada carregada: {placeholder.url}")  # Log de depuração
         return web_view
 
     def close_tab(self, index):
         if self.tabs.count() > 1:
             web_view = self.tabs.widget(index)
+            self.mark_session_dirty()
+            if isinstance(web_view, TabPlaceholder):
+                self.tabs.removeTab(index)
+                web_view.deleteLater()
+                return
             if web_view:
                 try:
                     web_view.urlChanged.disconnect()
                     web_view.loadProgress.disconnect()
                     web_view.loadFinished.disconnect()
                     web_view.titleChanged.disconnect()
-                    if web_view.page().profile() != self.private_profile:
-                        try:
-                            web_view.urlChanged.disconnect(self.add_to_history)
-                        except TypeError:
-                            pass
                 except Exception as e:
                     print(f"Erro ao desconectar sinais da aba {index}: {e}")
+                self.tab_lifecycle.untrack(web_view)
+                self.blocker.forget_first_party(web_view.url())
+                self.network_metrics.reset(web_view.page())
             self.tabs.removeTab(index)
+            if web_view:
+                self.release_web_view(web_view)
+                if self.leak_tracker.enabled and self.leak_tracker.report_on_close:
+                    QTimer.singleShot(LeakTracker.REPORT_DELAY, lambda: self.leak_tracker.check(self.view_count()))
+
+    def release_web_view(self, web_view):
+        # Página antes da view: ao destruir a página o Qt libera o renderizador dela
+        web_view.stop()
+        page = web_view.page()
+        if page and page.parent() is web_view:
+            page.deleteLater()
+        web_view.deleteLater()
 
     def navigate_to_url(self):
         url_text = self.url_bar.text().strip()
@@ -1412,9 +4943,17 @@ class Browser(QMainWindow):
             self.url_bar.setText(qurl.toString())
 
     def update_url_bar_on_tab_change(self, index):
+        if self.restoring_tabs:
+            return
         web_view = self.tabs.widget(index)
+        if isinstance(web_view, TabPlaceholder):
+            web_view = self.materialize_tab(index)
         if web_view:
+            self.mark_session_dirty()
+            self.tab_lifecycle.activate(web_view)
             self.url_bar.setText(web_view.url().toString())
+            if self.network_panel is not None:
+                self.network_panel.refresh()
 
     def update_progress_bar(self, progress):
         current_web_view = self.tabs.currentWidget()
@@ -1442,30 +4981,61 @@ class Browser(QMainWindow):
         if current_web_view:
             current_web_view.reload()
 
-    def add_to_history(self, qurl):
-        current_web_view = self.tabs.currentWidget()
-        if current_web_view and current_web_view == self.sender():
-            if current_web_view.page().profile() != self.private_profile:
-                url = qurl.toString()
-                title = current_web_view.title() or "Sem Título"
-                if url and url not in [h["url"] for h in self.history[-10:]]:
-                    self.history.append({"title": title, "url": url})
-                    self.update_history_menu()
+    def add_to_history(self, ok):
+        # loadFinished só chega para carregamentos do quadro principal; mudanças de #hash/pushState não contam como visita
+        web_view = self.sender()
+        if not ok or not isinstance(web_view, QWebEngineView) or web_view.page().profile() == self.private_profile:
+            return
+        # A página de bloqueio (blocked://domínio) não é uma visita
+        if web_view.url().scheme() == BLOCK_PAGE_SCHEME.decode():
+            return
+        url = web_view.url().toString()
+        title = web_view.title() or "Sem Título"
+        if url:
+            self.history_store.add_visit(url, title)
+            if not self.history_commit_timer.isActive():
+                self.history_commit_timer.start()
+            self.record_completion("visit", url, title)
+            self.update_history_menu()
 
     def update_history_menu(self):
         self.tools_history_menu.clear()
-        if not self.history:
+        if self.history_store.is_empty():
             action = QAction("Nenhum histórico", self)
             action.setEnabled(False)
             self.tools_history_menu.addAction(action)
         else:
-            for entry in self.history[-10:]:
-                if isinstance(entry, dict) and "title" in entry and "url" in entry:
-                    action = QAction(entry["title"], self)
-                    action.setData(entry["url"])
-                    action.triggered.connect(self.navigate_to_history)
-                    self.tools_history_menu.addAction(action)
-            self.tools_history_menu.setEnabled(bool(self.history))
+            self.add_history_actions(self.tools_history_menu, reversed(self.history_store.last(10)))
+            self.tools_history_menu.setEnabled(True)
+
+    def add_history_actions(self, menu, entries):
+        for entry in entries:
+            action = QAction(entry["title"], self)
+            action.setData(entry["url"])
+            action.triggered.connect(self.navigate_to_history)
+            action.hovered.connect(self.warm_action_origin)
+            menu.addAction(action)
+
+    def fill_history_menu(self, menu, entries, empty_text):
+        menu.clear()
+        if entries:
+            self.add_history_actions(menu, entries)
+        else:
+            action = QAction(empty_text, self)
+            action.setEnabled(False)
+            menu.addAction(action)
+
+    def update_site_history_menu(self):
+        entries = []
+        current_web_view = self.tabs.currentWidget()
+        if isinstance(current_web_view, QWebEngineView) and current_web_view.url().scheme() in ("http", "https"):
+            entries = self.history_store.by_domain(current_web_view.url().host(), 20)
+        self.fill_history_menu(self.site_history_menu, entries, "Nenhuma visita a este site")
+
+    def update_today_history_menu(self):
+        midnight = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+        entries = self.history_store.between(midnight, time.time(), 30)
+        self.fill_history_menu(self.today_history_menu, entries, "Nenhuma visita hoje")
 
     def navigate_to_history(self):
         action = self.sender()
@@ -1476,7 +5046,8 @@ class Browser(QMainWindow):
                 current_web_view.setUrl(QUrl(url))
 
     def limpar_historico(self):
-        self.history.clear()
+        self.history_store.clear()
+        self.record_completion("clear", None, None)
         self.update_history_menu()
         QMessageBox.information(self, "Histórico", "Histórico apagado com sucesso.")
 
@@ -1484,14 +5055,31 @@ class Browser(QMainWindow):
         self.add_new_tab()
 
     def closeEvent(self, event):
-        self.save_bookmarks()
-        self.save_blocked_sites()
-        self.save_blocked_lists()
-        self.save_whitelist()
+        self.connection_warmer.release()
+        self.view_pool.release()
+        if self.request_recorder is not None:
+            self.blocker.recorder = None
+            self.request_recorder.stop()
+        self.persistence.flush()
+        self.history_commit_timer.stop()
+        self.history_store.close()
+        ImportBlockListsDialog.wait_for_imports()
         super().closeEvent(event)
 
 if __name__ == "__main__":
+    startup_profiler = StartupProfiler.from_environment(sys.argv)
+    register_block_page_scheme()
+    leak_tracker = LeakTracker.from_environment(sys.argv)
+    soak_cycles = TabSoakTest.cycles_from_environment(sys.argv)
+    if soak_cycles:
+        # Teste de estresse sem janela e fora do diretório de dados do usuário
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        os.chdir(tempfile.mkdtemp(prefix="lukebrowser-soak-"))
+        leak_tracker.enabled = True
+    apply_chromium_flags(read_startup_settings("settings.json"))
+    startup_profiler.mark("flags do Chromium aplicadas")
     app = QApplication.instance() or QApplication(sys.argv)
+    startup_profiler.mark("QApplication criado")
     app.setStyleSheet("""
         QMainWindow {
             background-color: #f5f5f5;
@@ -1577,12 +5165,12 @@ if __name__ == "__main__":
             background-color: #f5f5f5;
             color: #333333;
         }
-        QListWidget {
+        QListView {
             background-color: #ffffff;
             color: #333333;
             border: 1px solid #cccccc;
         }
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #28a745;
             color: #ffffff;
         }
@@ -1602,6 +5190,10 @@ if __name__ == "__main__":
             color: #333333;
         }
     """)
-    browser = Browser()
+    browser = Browser(startup_profiler, leak_tracker)
     browser.show()
+    startup_profiler.mark("janela exibida")
+    if soak_cycles:
+        soak_test = TabSoakTest(browser, soak_cycles)
+        soak_test.start()
     sys.exit(app.exec())